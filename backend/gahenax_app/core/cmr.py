@@ -3,7 +3,8 @@ from __future__ import annotations
 import hashlib, json, os, sqlite3, time
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional, Tuple
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Tuple
 
 
 def utc_now() -> str:
@@ -17,6 +18,44 @@ def canonical_hash(payload: Dict[str, Any]) -> str:
     return hashlib.sha256(blob).hexdigest()
 
 
+def open_ledger_db(path: str) -> sqlite3.Connection:
+    """
+    Opens the ledger read-only for audits, with a 64 MiB page cache and a
+    256 MiB mmap window. Only per-connection pragmas: the file being
+    audited is never modified (journal mode is the writer's business, see CMR).
+    """
+    con = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+    con.execute("PRAGMA cache_size=-65536")
+    con.execute("PRAGMA mmap_size=268435456")
+    return con
+
+
+class CMRRecord(NamedTuple):
+    """Canonical ledger row, in ua_ledger INSERT column order."""
+    timestamp_start: str
+    timestamp_end: str
+    user_id: str
+    session_id: str
+    request_id: str
+    engine_version: str
+    contract_version: str
+    prompt_version: Optional[str]
+    input_fingerprint: Optional[str]
+    git_commit: Optional[str]
+    host_id: Optional[str]
+    seed: Optional[int]
+    latency_ms: float
+    contract_valid: bool
+    contract_fail_reason: Optional[str]
+    ua_spend: int
+    delta_s: Optional[float]
+    delta_s_per_ua: Optional[float]
+    h_rigidity: Optional[float]
+    work_units: int
+    prev_hash: Optional[str]
+    evidence_hash: str
+
+
 @dataclass
 class CMRConfig:
     db_path: str = "ua_ledger.sqlite"
@@ -37,6 +76,8 @@ class CMR:
     def _init_db(self) -> None:
         con = sqlite3.connect(self.cfg.db_path)
         try:
+            # Persistent: audits (open_ledger_db) read without blocking the appender
+            con.execute("PRAGMA journal_mode=WAL")
             con.execute(f"""
             CREATE TABLE IF NOT EXISTS {self.cfg.table} (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -111,6 +152,55 @@ class CMR:
         git_commit: Optional[str] = None,
         host_id: Optional[str] = None,
     ) -> str:
+        """Records a run and returns its evidence_hash. See `record`."""
+        return self.record(
+            user_id=user_id,
+            session_id=session_id,
+            request_id=request_id,
+            engine_version=engine_version,
+            contract_version=contract_version,
+            prompt_version=prompt_version,
+            input_fingerprint=input_fingerprint,
+            seed=seed,
+            latency_ms=latency_ms,
+            contract_valid=contract_valid,
+            contract_fail_reason=contract_fail_reason,
+            ua_spend=ua_spend,
+            delta_s=delta_s,
+            delta_s_per_ua=delta_s_per_ua,
+            h_rigidity=h_rigidity,
+            work_units=work_units,
+            timestamp_start=timestamp_start,
+            timestamp_end=timestamp_end,
+            git_commit=git_commit,
+            host_id=host_id,
+        ).evidence_hash
+
+    def record(
+        self,
+        *,
+        user_id: str,
+        session_id: str,
+        request_id: str,
+        engine_version: str,
+        contract_version: str,
+        prompt_version: Optional[str] = None,
+        input_fingerprint: Optional[str] = None,
+        seed: Optional[int],
+        latency_ms: float,
+        contract_valid: bool,
+        contract_fail_reason: Optional[str],
+        ua_spend: int,
+        delta_s: Optional[float],
+        delta_s_per_ua: Optional[float],
+        h_rigidity: Optional[float],
+        work_units: int,
+        timestamp_start: str,
+        timestamp_end: str,
+        git_commit: Optional[str] = None,
+        host_id: Optional[str] = None,
+    ) -> CMRRecord:
+        """Records a run and returns the canonical row as persisted."""
         prev = self._last_hash()
 
         payload = {
@@ -138,9 +228,12 @@ class CMR:
             "evidence_hash": "",
         }
         payload["evidence_hash"] = canonical_hash(payload)
+        rec = CMRRecord(**payload)
 
         con = sqlite3.connect(self.cfg.db_path)
         try:
+            con.execute("PRAGMA synchronous=NORMAL")  # WAL: durable at checkpoint, never corrupt
+            # contract_valid is a bool; sqlite3 binds it as 0/1.
             con.execute(
                 f"""
                 INSERT INTO {self.cfg.table} (
@@ -153,21 +246,10 @@ class CMR:
                     prev_hash, evidence_hash
                 ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
-                (
-                    payload["timestamp_start"], payload["timestamp_end"],
-                    payload["user_id"], payload["session_id"], payload["request_id"],
-                    payload["engine_version"], payload["contract_version"],
-                    payload["prompt_version"], payload["input_fingerprint"],
-                    payload["git_commit"], payload["host_id"],
-                    payload["seed"], payload["latency_ms"],
-                    1 if payload["contract_valid"] else 0, payload["contract_fail_reason"],
-                    payload["ua_spend"], payload["delta_s"], payload["delta_s_per_ua"],
-                    payload["h_rigidity"], payload["work_units"],
-                    payload["prev_hash"], payload["evidence_hash"],
-                )
+                rec,
             )
             con.commit()
         finally:
             con.close()
 
-        return payload["evidence_hash"]
+        return rec
@@ -10,7 +10,7 @@ from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timezone
 from pathlib import Path
 
-from .cmr import CMR, CMRConfig, canonical_hash
+from .cmr import CMR, CMRConfig, canonical_hash, open_ledger_db
 
 @dataclass
 class Snapshot:
@@ -41,7 +41,7 @@ class CMRTools:
         Full chain verification.
         Exit codes: 0 (OK), 2 (FAIL_CHAIN), 3 (FAIL_HASH)
         """
-        con = sqlite3.connect(self.cfg.db_path)
+        con = open_ledger_db(self.cfg.db_path)
         con.row_factory = sqlite3.Row
         try:
             rows = con.execute(f"SELECT * FROM {self.cfg.table} ORDER BY id ASC").fetchall()
@@ -94,7 +94,7 @@ class CMRTools:
 
     def generate_snapshot(self) -> Snapshot:
         """Generates a signed summary of the current ledger state."""
-        con = sqlite3.connect(self.cfg.db_path)
+        con = open_ledger_db(self.cfg.db_path)
         con.row_factory = sqlite3.Row
         try:
             rows = con.execute(f"SELECT * FROM {self.cfg.table} ORDER BY id ASC").fetchall()
@@ -133,7 +133,7 @@ class CMRTools:
         Hard FCD Gates evaluation for CI/CD usage.
         Returns (Pass/Fail, List of violations)
         """
-        con = sqlite3.connect(self.cfg.db_path)
+        con = open_ledger_db(self.cfg.db_path)
         con.row_factory = sqlite3.Row
         try:
             rows = con.execute(f"SELECT * FROM {self.cfg.table} ORDER BY id DESC LIMIT ?", (window_n,)).fetchall()
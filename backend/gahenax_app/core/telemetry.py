@@ -1,12 +1,15 @@
 import sqlite3
 import json
 import hashlib
+import operator
 import time
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 class LedgerRecord(BaseModel):
+    model_config = ConfigDict(frozen=True, extra='forbid')
+
     case_id: str
     timestamp: str
     engine_version: str
@@ -21,6 +24,13 @@ class LedgerRecord(BaseModel):
     work_units: int
     evidence_hash: str
 
+# Column order of the ua_ledger INSERT after (user_id, session_id, request_id).
+_COLS = operator.attrgetter(
+    'timestamp', 'engine_version', 'contract_version',
+    'ua_spend', 'delta_s', 'delta_s_per_ua', 'latency_ms', 'contract_valid',
+    'h_rigidity', 'work_units', 'evidence_hash',
+)
+
 def compute_evidence_hash(payload: Dict[str, Any]) -> str:
     canon = dict(payload)
     canon.pop("evidence_hash", None)
@@ -60,13 +70,12 @@ class UALedgerDB:
     def append(self, *, user_id: str, session_id: str, request_id: str, rec: LedgerRecord) -> None:
         con = sqlite3.connect(self.db_path)
         try:
+            # contract_valid is a bool; sqlite3 binds it as 0/1.
             con.execute("""
                 INSERT INTO ua_ledger (
-                    timestamp, user_id, session_id, request_id, engine_version, contract_version,
+                    user_id, session_id, request_id, timestamp, engine_version, contract_version,
                     ua_spend, delta_s, delta_s_per_ua, latency_ms, contract_valid, h_rigidity, work_units, evidence_hash
                 ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (rec.timestamp, user_id, session_id, request_id, rec.engine_version, rec.contract_version,
-                  rec.ua_spend, rec.delta_s, rec.delta_s_per_ua, rec.latency_ms, 1 if rec.contract_valid else 0,
-                  rec.h_rigidity, rec.work_units, rec.evidence_hash))
+            """, (user_id, session_id, request_id, *_COLS(rec)))
             con.commit()
         finally: con.close()
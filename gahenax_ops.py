@@ -1,16 +1,10 @@
 from __future__ import annotations
 
 import argparse
-import dataclasses
-import hashlib
-import json
 import os
-import random
-import sqlite3
 import time
 import sys
-from dataclasses import dataclass, asdict
-from datetime import datetime, timezone
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Literal, Optional, Tuple
 
@@ -21,14 +15,6 @@ backend_path = str(Path(__file__).parent / "backend")
 if backend_path not in sys.path:
     sys.path.append(backend_path)
 
-try:
-    from gahenax_app.core.gahenax_engine import GahenaxGovernor, RenderProfile
-except ImportError:
-    # Fallback for standalone tests if backend is not present
-    class GahenaxGovernor:
-        def __init__(self, budget_ua): self.ua = type('obj', (object,), {'spent': 0, 'efficiency': 0})
-        def run_inference_cycle(self, text, context=None): return None
-
 # =============================================================================
 # (Core) Contract: GahenaxOutput (frozen interface)
 # =============================================================================
@@ -46,9 +32,6 @@ class GahenaxOutput(BaseModel):
 
 CONTRACT_VERSION = "GahenaxOutput-v1.0"
 
-from gahenax_app.core.cmr import CMR, CMRConfig, utc_now
-from gahenax_app.core.cmr_tools import CMRTools
-
 # =============================================================================
 # Engine Integration
 # =============================================================================
@@ -72,7 +55,7 @@ class RealGahenaxEngine:
 
     def run(self, prompt: str, seed: int, ua_budget_hint: int) -> EngineResult:
         # 1. Initialize Governor with budget (AUDIT mode for benchmarks)
-        from gahenax_app.core.gahenax_engine import EngineMode, compute_cni_fingerprint
+        from gahenax_app.core.gahenax_engine import GahenaxGovernor, EngineMode, compute_cni_fingerprint
         gov = GahenaxGovernor(budget_ua=float(ua_budget_hint), mode=EngineMode.AUDIT)
         
         # 2. Compute CNI fingerprint
@@ -184,6 +167,9 @@ def evaluate_claims(summary: BenchmarkSummary) -> List[ClaimGate]:
 # =============================================================================
 
 def run_benchmark(engine, cases_path, out_path, seed, baseline_path=None, ledger_db=None, use_redis=False):
+    import json
+    from gahenax_app.core.cmr import CMR, CMRConfig, utc_now
+
     with open(cases_path, "r", encoding="utf-8") as f:
         cases = [json.loads(line) for line in f if line.strip()]
     
@@ -214,7 +200,7 @@ def run_benchmark(engine, cases_path, out_path, seed, baseline_path=None, ledger
         try: GahenaxOutput(**eng_res.output)
         except ValidationError: contract_valid = False
 
-        evidence_hash = cmr.record_run(
+        rec = cmr.record(
             user_id="bench",
             session_id="bench_session",
             request_id=bc["case_id"],
@@ -237,18 +223,7 @@ def run_benchmark(engine, cases_path, out_path, seed, baseline_path=None, ledger
             host_id=os.getenv("HOSTNAME")
         )
 
-        # Build local record for summary compute
-        # This is a bit redundant but keeps the summary logic working
-        records.append(type('Record', (object,), {
-            "engine_version": engine.engine_version,
-            "contract_version": CONTRACT_VERSION,
-            "latency_ms": latency,
-            "contract_valid": contract_valid,
-            "ua_spend": ua_spend,
-            "delta_s_per_ua": eng_res.delta_s / ua_spend if ua_spend > 0 else 0,
-            "h_rigidity": eng_res.h_rigidity,
-            "work_units": eng_res.work_units
-        }))
+        records.append(rec)
 
     summary = compute_summary(records, baseline)
     gates = evaluate_claims(summary)
@@ -267,54 +242,130 @@ def run_benchmark(engine, cases_path, out_path, seed, baseline_path=None, ledger
 # CLI Main
 # =============================================================================
 
+# Semaforo classification runs in SQLite; NULL rigidity falls through to ORANGE.
+_SEMAFORO_ROWS_SQL = """
+    SELECT
+        id, h_rigidity,
+        CASE WHEN input_fingerprint <> '' THEN substr(input_fingerprint, 1, 8) ELSE 'n/a' END AS fid,
+        CASE
+            WHEN NOT contract_valid OR h_rigidity > 1e-8 THEN 'RED'
+            WHEN h_rigidity <= 1e-14 THEN 'GREEN'
+            WHEN h_rigidity <= 1e-11 THEN 'YELLOW'
+            ELSE 'ORANGE'
+        END AS color
+    FROM ua_ledger
+    ORDER BY id DESC
+    LIMIT ?
+"""
+_SEMAFORO_ROW_FMT = "{:<6} {:<15} {:<10} {}\n".format
+_SEMAFORO_LABELS = {
+    "RED": "FAIL: RED (GHOST)",
+    "GREEN": "OK: GREEN (STRUCTURAL)",
+    "YELLOW": "WARN: YELLOW (ISLAND-T)",
+    "ORANGE": "WARN: ORANGE (DRIFT-WARN)",
+}
+
+_SUBCOMMANDS = ("bench", "verify", "snapshot", "gate", "semaforo")
+
+def _sniff_subcommand(argv: List[str]) -> Optional[str]:
+    """Returns the subcommand named in argv, or None if absent/unknown or help is requested."""
+    for tok in argv:
+        if tok in ("-h", "--help"):
+            return None
+        if not tok.startswith("-"):
+            return tok if tok in _SUBCOMMANDS else None
+    return None
+
+def _add_subparser(subparsers, name: str) -> None:
+    if name == "bench":
+        # (1) Benchmark
+        bench_p = subparsers.add_parser("bench", help="Run benchmark suite")
+        bench_p.add_argument("--cases", required=True)
+        bench_p.add_argument("--out", required=True)
+        bench_p.add_argument("--seed", type=int, default=1337)
+        bench_p.add_argument("--baseline", help="Previous results JSON for delta check")
+        bench_p.add_argument("--ledger-db", help="SQLite path (default: ua_ledger.sqlite)")
+        bench_p.add_argument("--redis", action="store_true", help="Use Redis for UA tracking")
+
+    elif name == "verify":
+        # (2) Verify
+        verify_p = subparsers.add_parser("verify", help="Verify CMR integrity")
+        verify_p.add_argument("--db", default="ua_ledger.sqlite")
+
+    elif name == "snapshot":
+        # (3) Snapshot
+        snap_p = subparsers.add_parser("snapshot", help="Generate signed ledger snapshot")
+        snap_p.add_argument("--db", default="ua_ledger.sqlite")
+        snap_p.add_argument("--out", default="cmr_snapshot.json")
+
+    elif name == "gate":
+        # (4) Gate
+        gate_p = subparsers.add_parser("gate", help="Evaluate FCD Hard Gates (CI/CD)")
+        gate_p.add_argument("--db", default="ua_ledger.sqlite")
+        gate_p.add_argument("--window", type=int, default=100)
+
+    elif name == "semaforo":
+        # (5) Semaforo
+        semaforo_p = subparsers.add_parser("semaforo", help="Protocolo de Auditoría Semáforo")
+        semaforo_p.add_argument("--db", default="ua_ledger.sqlite")
+        semaforo_p.add_argument("--window", type=int, default=20)
+
+_USAGE = """usage: gahenax_ops.py [-h] [-V] {bench,verify,snapshot,gate,semaforo} ...
+
+Gahenax Core Operational Suite (CMR/FCD)
+
+subcommands:
+  bench       Run benchmark suite
+  verify      Verify CMR integrity
+  snapshot    Generate signed ledger snapshot
+  gate        Evaluate FCD Hard Gates (CI/CD)
+  semaforo    Protocolo de Auditoría Semáforo
+
+options:
+  -h, --help     show this help message and exit
+  -V, --version  show the engine version and exit
+"""
+
 def main():
+    # Fast path: top-level help/version never needs argparse.
+    if len(sys.argv) == 1 or sys.argv[1] in ("-h", "--help", "-V", "--version"):
+        if len(sys.argv) > 1 and sys.argv[1] in ("-V", "--version"):
+            print(RealGahenaxEngine.engine_version)
+        else:
+            sys.stdout.write(_USAGE)
+        sys.exit(0)
+
     parser = argparse.ArgumentParser(description="Gahenax Core Operational Suite (CMR/FCD)")
     subparsers = parser.add_subparsers(dest="cmd")
 
-    # (1) Benchmark
-    bench_p = subparsers.add_parser("bench", help="Run benchmark suite")
-    bench_p.add_argument("--cases", required=True)
-    bench_p.add_argument("--out", required=True)
-    bench_p.add_argument("--seed", type=int, default=1337)
-    bench_p.add_argument("--baseline", help="Previous results JSON for delta check")
-    bench_p.add_argument("--ledger-db", help="SQLite path (default: ua_ledger.sqlite)")
-    bench_p.add_argument("--redis", action="store_true", help="Use Redis for UA tracking")
-
-    # (2) Verify
-    verify_p = subparsers.add_parser("verify", help="Verify CMR integrity")
-    verify_p.add_argument("--db", default="ua_ledger.sqlite")
-
-    # (3) Snapshot
-    snap_p = subparsers.add_parser("snapshot", help="Generate signed ledger snapshot")
-    snap_p.add_argument("--db", default="ua_ledger.sqlite")
-    snap_p.add_argument("--out", default="cmr_snapshot.json")
-
-    # (4) Gate
-    gate_p = subparsers.add_parser("gate", help="Evaluate FCD Hard Gates (CI/CD)")
-    gate_p.add_argument("--db", default="ua_ledger.sqlite")
-    gate_p.add_argument("--window", type=int, default=100)
-
-    # (5) Semaforo
-    semaforo_p = subparsers.add_parser("semaforo", help="Protocolo de Auditoría Semáforo")
-    semaforo_p.add_argument("--db", default="ua_ledger.sqlite")
-    semaforo_p.add_argument("--window", type=int, default=20)
+    # Only build the subparser actually invoked; fall back to all of them
+    # so --help and usage errors still list every subcommand.
+    cmd = _sniff_subcommand(sys.argv[1:])
+    for name in (cmd,) if cmd else _SUBCOMMANDS:
+        _add_subparser(subparsers, name)
 
     args = parser.parse_args()
 
+    # Subcommand-specific imports are deferred so --help and bad input stay cheap.
     if args.cmd == "bench":
-        from gahenax_app.core.gahenax_engine import GahenaxGovernor
         run_benchmark(get_engine(), args.cases, args.out, args.seed, 
                       baseline_path=args.baseline, 
                       ledger_db=args.ledger_db, 
                       use_redis=args.redis)
     
     elif args.cmd == "verify":
+        from gahenax_app.core.cmr import CMRConfig
+        from gahenax_app.core.cmr_tools import CMRTools
         tools = CMRTools(CMRConfig(db_path=args.db))
         code, msg = tools.verify_integrity()
         print(msg)
         sys.exit(code)
 
     elif args.cmd == "snapshot":
+        import json
+        from dataclasses import asdict
+        from gahenax_app.core.cmr import CMRConfig
+        from gahenax_app.core.cmr_tools import CMRTools
         tools = CMRTools(CMRConfig(db_path=args.db))
         try:
             snap = tools.generate_snapshot()
@@ -326,6 +377,8 @@ def main():
             sys.exit(1)
 
     elif args.cmd == "gate":
+        from gahenax_app.core.cmr import CMRConfig
+        from gahenax_app.core.cmr_tools import CMRTools
         tools = CMRTools(CMRConfig(db_path=args.db))
         ok, violations = tools.evaluate_gates(window_n=args.window)
         if ok:
@@ -344,41 +397,27 @@ def main():
             print(f"ERROR: Database {db} not found.")
             sys.exit(1)
 
-        con = sqlite3.connect(db)
-        con.row_factory = sqlite3.Row
+        from gahenax_app.core.cmr import open_ledger_db
+        con = open_ledger_db(db)
         try:
-            rows = con.execute(f"SELECT * FROM ua_ledger ORDER BY id DESC LIMIT ?", (window,)).fetchall()
-            if not rows:
+            # One statement, so the table and the counts see the same rows
+            rows = con.execute(_SEMAFORO_ROWS_SQL, (window,)).fetchall()
+            stats = {"GREEN": 0, "YELLOW": 0, "ORANGE": 0, "RED": 0}
+            for *_, color in rows:
+                stats[color] += 1
+            total = len(rows)
+            if not total:
                 print("No records found in ledger.")
                 return
 
-            print(f"\nAUDITORÍA SEMÁFORO (Chronos-Hodge v2.0) - Últimos {len(rows)} registros\n")
+            print(f"\nAUDITORÍA SEMÁFORO (Chronos-Hodge v2.0) - Últimos {total} registros\n")
             print(f"{'ID':<6} {'RIGIDEZ (H)':<15} {'FINGERPRINT':<10} {'ESTADO':<25}")
             print("-" * 60)
 
-            stats = {"GREEN": 0, "YELLOW": 0, "ORANGE": 0, "RED": 0}
-
-            for r in rows:
-                h = r["h_rigidity"]
-                valid = bool(r["contract_valid"])
-                fid = (r["input_fingerprint"][:8]) if r["input_fingerprint"] else "n/a"
-                
-                # Semaforo Logic
-                if not valid or h > 1e-8:
-                    color = "RED"
-                    label = "FAIL: RED (GHOST)"
-                elif h <= 1e-14:
-                    color = "GREEN"
-                    label = "OK: GREEN (STRUCTURAL)"
-                elif h <= 1e-11:
-                    color = "YELLOW"
-                    label = "WARN: YELLOW (ISLAND-T)"
-                else:
-                    color = "ORANGE"
-                    label = "WARN: ORANGE (DRIFT-WARN)"
-
-                stats[color] += 1
-                print(f"{r['id']:<6} {h:<15.2e} {fid:<10} {label}")
+            sys.stdout.write("".join([
+                _SEMAFORO_ROW_FMT(rid, "n/a" if h is None else f"{h:.2e}", fid, _SEMAFORO_LABELS[color])
+                for rid, h, fid, color in rows
+            ]))
 
             print("\n" + "=" * 60)
             print(f"RESUMEN SEMÁFORO:")
@@ -391,7 +430,7 @@ def main():
             if stats["RED"] > 0:
                 print("\nCRITICAL: Ghosts detected in the ledger. Integrity compromised.")
                 sys.exit(2)
-            elif stats["ORANGE"] > (len(rows) * 0.3):
+            elif stats["ORANGE"] > (total * 0.3):
                 print("\nWARNING: High drift detected. Recalibration recommended.")
             else:
                 print("\nSYSTEM HEALTH: OPTIMAL (Chronos-Hodge Stable)")
@@ -5,48 +5,88 @@ Ledger compactor — secondary utility, NOT core.
 Converts ledger.jsonl → merged_clean.jsonl by:
   1. Reading all events
   2. Dedup by canonical payload hash
-  3. Emitting clean payloads only
+  3. Emitting clean payloads only (canonical JSON, one per line)
 
 This is a "polisher", not the heart. The ledger is always
 the source of truth; this produces a clean derivative.
 """
 from __future__ import annotations
-import json
-from typing import Dict, Any
-from orchestrator.contracts import sha256_json
+import mmap
+import os
+from typing import Dict
+from orchestrator.contracts import (
+    canonical_json, sha256_json_bytes, payload_key, json_loads, write_all,
+)
+
+_FLUSH_BYTES = 1 << 20
 
 
 def compact(ledger_path: str, out_path: str) -> Dict[str, int]:
     """
     Read ledger, deduplicate by payload hash, write clean output.
 
+    The ledger is mmapped and scanned for newlines; each line is parsed
+    once, and the canonical payload bytes are both hashed and written.
+    Events carrying payload_hash are deduped without re-serializing.
+
     Returns:
         {"kept": int, "dropped": int}
     """
-    seen: set[str] = set()
+    seen: set[int] = set()
     kept = 0
     dropped = 0
+    buf = bytearray()
+
+    # Open the ledger first: a missing ledger must not truncate the old output
+    with open(ledger_path, "rb") as fin:
+        fd = os.open(out_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+        try:
+            if os.fstat(fin.fileno()).st_size == 0:
+                return {"kept": 0, "dropped": 0}
+
+            with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                size = len(mm)
+                start = 0
+                while start < size:
+                    end = mm.find(b"\n", start)
+                    if end == -1:
+                        end = size
+                    line = mm[start:end].strip()
+                    start = end + 1
+                    if not line:
+                        continue
+
+                    obj = json_loads(line)
+                    payload = obj.get("payload", {})
+                    if not isinstance(payload, dict):
+                        continue
+
+                    ph = obj.get("payload_hash")
+                    if ph:
+                        key = payload_key(ph)
+                        if key in seen:
+                            dropped += 1
+                            continue
+                        canon = canonical_json(payload)
+                    else:
+                        canon, ph = sha256_json_bytes(payload)
+                        key = payload_key(ph)
+                        if key in seen:
+                            dropped += 1
+                            continue
+
+                    seen.add(key)
+                    buf += canon
+                    buf += b"\n"
+                    kept += 1
+                    if len(buf) >= _FLUSH_BYTES:
+                        write_all(fd, buf)
+                        buf.clear()
 
-    with open(ledger_path, "r", encoding="utf-8") as fin, \
-         open(out_path, "w", encoding="utf-8") as fout:
-        for line in fin:
-            line = line.strip()
-            if not line:
-                continue
-            obj = json.loads(line)
-            payload = obj.get("payload", {})
-            if not isinstance(payload, dict):
-                continue
-            h = sha256_json(payload)
-            if h in seen:
-                dropped += 1
-                continue
-            seen.add(h)
-            fout.write(
-                json.dumps(payload, separators=(",", ":"), ensure_ascii=True)
-                + "\n"
-            )
-            kept += 1
+            if buf:
+                write_all(fd, buf)
+        finally:
+            os.close(fd)
 
     return {"kept": kept, "dropped": dropped}
 
@@ -10,11 +10,21 @@ Laws:
 """
 from __future__ import annotations
 from dataclasses import dataclass, asdict, field
-from typing import Any, Dict, Optional, Literal, List
+from typing import Any, Dict, Optional, Literal, List, Tuple
 import json
 import hashlib
+import math
+import os
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # optional accelerator; stdlib json is the fallback
+    orjson = None
+
+# Accepts str or bytes. orjson.JSONDecodeError subclasses json.JSONDecodeError.
+json_loads = orjson.loads if orjson is not None else json.loads
+
 JobStatus = Literal["PENDING", "RUNNING", "DONE", "FAILED"]
 AcceptVerdict = Literal["ACCEPTED", "REJECTED_SCHEMA", "REJECTED_TOL", "REJECTED_DUP"]
 
@@ -24,13 +34,49 @@ def now_iso() -> str:
     return datetime.now().astimezone().isoformat(timespec="seconds")
 
 
+# Canonical encoder, built once. Kept on stdlib json on purpose: orjson
+# formats floats differently (1e-05 vs 0.00001, 1e+16 vs 1e16) and does
+# not escape non-ASCII, which would silently change every ledger hash.
+_canonical_encode = json.JSONEncoder(
+    sort_keys=True, separators=(",", ":"), ensure_ascii=True,
+).encode
+_sha256 = hashlib.sha256
+
+
+def canonical_json(obj: Dict[str, Any]) -> bytes:
+    """Canonical JSON bytes (sorted keys, compact, ASCII) — what sha256_json hashes."""
+    return _canonical_encode(obj).encode("ascii")
+
+
 def sha256_json(obj: Dict[str, Any]) -> str:
     """Deterministic SHA-256 of a JSON-serializable dict."""
-    b = json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=True).encode("utf-8")
-    return "sha256:" + hashlib.sha256(b).hexdigest()
+    return "sha256:" + _sha256(canonical_json(obj)).hexdigest()
 
 
-@dataclass(frozen=True)
+def sha256_json_bytes(obj: Dict[str, Any]) -> Tuple[bytes, str]:
+    """Canonical bytes of obj plus their sha256_json digest, from one encode."""
+    b = canonical_json(obj)
+    return b, "sha256:" + _sha256(b).hexdigest()
+
+
+def payload_key(payload_hash: str) -> int:
+    """
+    64-bit dedup key: first 8 bytes of a "sha256:<hex>" digest.
+    Collision odds stay negligible for dedup caches; the ledger
+    keeps the full hash and remains the source of truth.
+    """
+    return int(payload_hash[7:23], 16)
+
+
+def is_finite_number(x: Any) -> bool:
+    """
+    int or finite float. NaN/Infinity would be written by the stdlib
+    encoder but rejected by orjson on replay, so they never enter the ledger.
+    """
+    return isinstance(x, int) or (isinstance(x, float) and math.isfinite(x))
+
+
+@dataclass(frozen=True, slots=True)
 class Job:
     """Immutable work unit dispatched to a worker."""
     job_id: str
@@ -42,7 +88,7 @@ class Job:
     last_error: Optional[str] = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ResultPayload:
     """
     Canonical schema for a mined result.
@@ -55,34 +101,45 @@ class ResultPayload:
     @staticmethod
     def validate(d: Dict[str, Any]) -> bool:
         """Strict schema gate. Returns False on any violation."""
-        if not isinstance(d, dict):
+        if type(d) is not dict:
             return False
-        if "t" not in d or "root_val" not in d or "meta" not in d:
-            return False
-        if not isinstance(d["meta"], dict):
-            return False
-        try:
-            float(d["t"])
-            float(d["root_val"])
-        except (ValueError, TypeError):
-            return False
-        return True
+        get = d.get
+        return (
+            is_finite_number(get("t"))
+            and is_finite_number(get("root_val"))
+            and isinstance(get("meta"), dict)
+        )
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LedgerEvent:
     """
     Immutable, hashable ledger entry.
     The hash covers everything EXCEPT itself (self-referential integrity).
+    payload_hash is stored beside the payload so replay never re-hashes it.
     """
     run_id: str
     worker_id: int
     job_id: str
     seq: int
     payload: Dict[str, Any]
+    payload_hash: str
     ts: str
     hash: str
 
+    def _as_dict(self) -> Dict[str, Any]:
+        """Field dict for serialization (attribute reads, no asdict reflection)."""
+        return {
+            "run_id": self.run_id,
+            "worker_id": self.worker_id,
+            "job_id": self.job_id,
+            "seq": self.seq,
+            "payload": self.payload,
+            "payload_hash": self.payload_hash,
+            "ts": self.ts,
+            "hash": self.hash,
+        }
+
     @staticmethod
     def from_parts(
         run_id: str,
@@ -90,6 +147,7 @@ class LedgerEvent:
         job_id: str,
         seq: int,
         payload: Dict[str, Any],
+        payload_hash: Optional[str] = None,
     ) -> "LedgerEvent":
         """Factory: builds event and computes integrity hash."""
         base = {
@@ -98,14 +156,86 @@ class LedgerEvent:
             "job_id": job_id,
             "seq": seq,
             "payload": payload,
+            "payload_hash": payload_hash or sha256_json(payload),
             "ts": now_iso(),
         }
         h = sha256_json(base)
         return LedgerEvent(**base, hash=h)
 
+    @staticmethod
+    def from_parts_precanon(
+        run_id: str,
+        worker_id: int,
+        job_id: str,
+        seq: int,
+        payload: Dict[str, Any],
+        payload_bytes: bytes,
+        payload_hash: str,
+    ) -> "LedgerEvent":
+        """
+        Same as from_parts, for a payload already canonicalized by
+        sha256_json_bytes: its bytes are spliced into the (sorted-key)
+        canonical event instead of re-walking the dict.
+        """
+        ts = now_iso()
+        enc = _canonical_encode
+        canon = b"".join((
+            b'{"job_id":', enc(job_id).encode("ascii"),
+            b',"payload":', payload_bytes,
+            b',"payload_hash":', enc(payload_hash).encode("ascii"),
+            b',"run_id":', enc(run_id).encode("ascii"),
+            b',"seq":', enc(seq).encode("ascii"),
+            b',"ts":', enc(ts).encode("ascii"),
+            b',"worker_id":', enc(worker_id).encode("ascii"),
+            b"}",
+        ))
+        return LedgerEvent(
+            run_id=run_id,
+            worker_id=worker_id,
+            job_id=job_id,
+            seq=seq,
+            payload=payload,
+            payload_hash=payload_hash,
+            ts=ts,
+            hash="sha256:" + _sha256(canon).hexdigest(),
+        )
+
 
 def to_jsonl_line(obj: Any) -> str:
-    """Serialize dataclass or dict to a single JSONL line."""
-    if hasattr(obj, "__dataclass_fields__"):
+    """
+    Serialize dataclass or dict to a single JSONL line.
+    Slow-path utility; the ledger writer uses LedgerEvent._as_dict + jsonl_bytes.
+    """
+    if type(obj) is LedgerEvent:
+        obj = obj._as_dict()
+    elif hasattr(obj, "__dataclass_fields__"):
         obj = asdict(obj)
     return json.dumps(obj, separators=(",", ":"), ensure_ascii=True)
+
+
+# Ledger line encoder: stdlib for the same reasons as _canonical_encode.
+# orjson would write NaN as null (the line would no longer match its own
+# hashes) and raises on ints wider than 64 bits after seq is consumed.
+_jsonl_encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=True).encode
+
+
+def jsonl_bytes(d: Dict[str, Any]) -> bytes:
+    """
+    Encode a dict as one newline-terminated JSONL record (not canonical:
+    use canonical_json for anything that is hashed). Floats round-trip exactly.
+    """
+    return (_jsonl_encode(d) + "\n").encode("ascii")
+
+
+def write_all(fd: int, data: bytes) -> None:
+    """os.write until every byte is written (a short write must not drop a tail)."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def json_bytes(d: Dict[str, Any]) -> bytes:
+    """Compact JSON bytes for IPC messages (not canonical, not hashed)."""
+    if orjson is not None:
+        return orjson.dumps(d)
+    return json.dumps(d, separators=(",", ":")).encode("utf-8")
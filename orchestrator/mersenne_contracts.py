@@ -7,7 +7,11 @@ from __future__ import annotations
 from dataclasses import dataclass, asdict
 from typing import Any, Dict, Optional
 import hashlib
-from .contracts import Job, ResultPayload
+from .contracts import Job, ResultPayload, is_finite_number
+
+_REQUIRED = frozenset({
+    "p", "residue_hash", "roundoff_max", "engine_version", "wall_time", "is_prime", "meta",
+})
 
 @dataclass(frozen=True)
 class MersenneJob(Job):
@@ -17,7 +21,7 @@ class MersenneJob(Job):
     # Overriding Job just to be explicit about p_start/p_end if needed
     # but Job already has t_start/t_end which can be p_start/p_end.
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MersenneResultPayload:
     """
     Canonical schema for a Mersenne certification result.
@@ -34,18 +38,13 @@ class MersenneResultPayload:
     @staticmethod
     def validate(d: Dict[str, Any]) -> bool:
         """Strict schema gate for Mersenne results."""
-        if not isinstance(d, dict):
-            return False
-        required = {"p", "residue_hash", "roundoff_max", "engine_version", "wall_time", "is_prime", "meta"}
-        if not all(k in d for k in required):
-            return False
-        try:
-            int(d["p"])
-            float(d["roundoff_max"])
-            float(d["wall_time"])
-            bool(d["is_prime"])
-            if not isinstance(d["residue_hash"], str) or len(d["residue_hash"]) != 64:
-                return False
-        except (ValueError, TypeError):
+        if type(d) is not dict or not _REQUIRED <= d.keys():
             return False
-        return True
+        residue_hash = d["residue_hash"]
+        return (
+            isinstance(d["p"], int)
+            and is_finite_number(d["roundoff_max"])
+            and is_finite_number(d["wall_time"])
+            and isinstance(residue_hash, str)
+            and len(residue_hash) == 64
+        )
@@ -7,18 +7,28 @@ Architecture invariants:
   2. LOCK ENFORCEMENT: orchestrator.lock prevents concurrent instances.
   3. RESUME-SAFE: State reconstructed from ledger replay on startup.
   4. DEDUP BY HASH: Canonical payload hash, not magic or faith.
-  5. ATOMIC ACCEPTANCE: append → mark → save (in that order).
+  5. ATOMIC ACCEPTANCE: append → mark (state saved at checkpoints).
 """
 from __future__ import annotations
 import os
 import json
-import queue
 import threading
-from typing import Dict, Any, List, Optional, Set
+import time
+from collections import deque
+from typing import Deque, Dict, Any, Iterator, List, Optional, Set
 from orchestrator.contracts import (
     Job, LedgerEvent, ResultPayload,
-    AcceptVerdict, to_jsonl_line, sha256_json,
+    AcceptVerdict, jsonl_bytes, sha256_json, sha256_json_bytes, payload_key,
+    json_loads, orjson, write_all,
 )
+from orchestrator.shm_columns import unpack_columns
+
+
+# fdatasync skips the metadata flush; not available on macOS/Windows.
+_datasync = getattr(os, "fdatasync", os.fsync)
+
+# save_state retry delays for a locked state.json (Windows/OneDrive)
+_REPLACE_BACKOFF_S = (0.05, 0.10, 0.15, 0.20, 0.25)
 
 
 class SingleWriterOrchestrator:
@@ -37,12 +47,14 @@ class SingleWriterOrchestrator:
         eps_root: float = 1e-10,
         max_attempts: int = 3,
         checkpoint_every: int = 200,
+        group_commit_ms: float = 50.0,
     ):
         self.run_dir = run_dir
         self.run_id = run_id
         self.eps_root = eps_root
         self.max_attempts = max_attempts
         self.checkpoint_every = checkpoint_every
+        self.group_commit_s = group_commit_ms / 1000.0
 
         os.makedirs(self.run_dir, exist_ok=True)
         os.makedirs(os.path.join(self.run_dir, "checkpoints"), exist_ok=True)
@@ -51,7 +63,10 @@ class SingleWriterOrchestrator:
         self.ledger_path = os.path.join(self.run_dir, "ledger.jsonl")
         self.lock_path = os.path.join(self.run_dir, "orchestrator.lock")
 
-        self.q: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        # Worker -> reducer inbox. deque.append/popleft are atomic under the
+        # GIL, so producers need no lock; the event only wakes an idle reducer.
+        self.q: Deque[Optional[Dict[str, Any]]] = deque()
+        self._wakeup = threading.Event()
         self.stop_event = threading.Event()
 
         self.seq: int = 0
@@ -64,8 +79,23 @@ class SingleWriterOrchestrator:
             "seq": 0,
         }
 
-        # Dedup set: hashes of canonical payloads already accepted
-        self.accepted_payload_hashes: Set[str] = set()
+        # FIFO of PENDING job_ids, so dispatch never scans state["jobs"]
+        self._pending_jobs: Deque[str] = deque()
+
+        # state.json writes are coalesced: mutations mark dirty, the reducer
+        # flushes at checkpoints and on exit (ledger replay covers any gap)
+        self._state_dirty = False
+
+        # Append-only ledger fd, held open for the reducer's lifetime.
+        # Accepted events are group-committed: buffered, then written and
+        # fdatasync'ed together at checkpoints or after group_commit_ms idle.
+        self._ledger_fd: Optional[int] = None
+        self._pending: List[bytes] = []
+        self._pending_t0 = 0.0
+
+        # Dedup set: 64-bit keys (payload_key) of canonical payloads already accepted
+        self.accepted_payload_hashes: Set[int] = set()
+        self._accepted_since_ckpt = 0
 
     # ─────────────── locking ───────────────
     def acquire_lock(self) -> None:
@@ -93,56 +123,95 @@ class SingleWriterOrchestrator:
             with open(self.state_path, "r", encoding="utf-8") as f:
                 self.state = json.load(f)
             self.seq = int(self.state.get("seq", 0))
+        self._pending_jobs = deque(
+            job_id for job_id, jd in self.state["jobs"].items()
+            if jd["status"] == "PENDING"
+        )
 
     def save_state(self) -> None:
         """Atomic state save. Windows-safe with retry for OneDrive/antivirus locks."""
         tmp = self.state_path + ".tmp"
-        data = json.dumps(self.state, indent=2, sort_keys=True)
+        # Equivalent JSON, not identical bytes: orjson writes 1e16 / 0.00001 and
+        # raw UTF-8 where json writes 1e+16 / 1e-05 and \u escapes. Fine for a
+        # cache that is only ever parsed back; nothing hashes state.json.
+        if orjson is not None:
+            data = orjson.dumps(self.state, option=orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2)
+        else:
+            data = json.dumps(self.state, indent=2, sort_keys=True).encode("utf-8")
+        self._state_dirty = False
 
-        with open(tmp, "w", encoding="utf-8") as f:
+        with open(tmp, "wb") as f:
             f.write(data)
 
         # os.replace can fail on Windows if OneDrive/antivirus holds a lock
-        import time as _time
-        for attempt in range(5):
+        for delay in _REPLACE_BACKOFF_S:
             try:
                 os.replace(tmp, self.state_path)
                 return
             except PermissionError:
-                _time.sleep(0.05 * (attempt + 1))
+                time.sleep(delay)
 
         # Fallback: direct write (non-atomic but functional)
         try:
             os.remove(tmp)
         except OSError:
             pass
-        with open(self.state_path, "w", encoding="utf-8") as f:
+        with open(self.state_path, "wb") as f:
             f.write(data)
 
+    def _save_state_maybe(self) -> None:
+        """Save state only if it changed since the last save."""
+        if self._state_dirty:
+            self.save_state()
+
+    def open_ledger(self) -> None:
+        """Open the ledger once for appending. O_APPEND writes are atomic on POSIX."""
+        if self._ledger_fd is None:
+            flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+            self._ledger_fd = os.open(self.ledger_path, flags, 0o644)
+
+    def flush_ledger(self) -> None:
+        """Group commit: write all pending events in one append, then fdatasync."""
+        if not self._pending:
+            return
+        self.open_ledger()
+        write_all(self._ledger_fd, b"".join(self._pending))
+        self._pending.clear()
+        _datasync(self._ledger_fd)
+
+    def close_ledger(self) -> None:
+        """Commit pending events and close the ledger fd."""
+        self.flush_ledger()
+        if self._ledger_fd is not None:
+            os.close(self._ledger_fd)
+            self._ledger_fd = None
+
     def append_ledger(self, evt: LedgerEvent) -> None:
-        """Append a single event to the append-only ledger."""
-        with open(self.ledger_path, "a", encoding="utf-8") as f:
-            f.write(to_jsonl_line(evt) + "\n")
+        """Queue a single event for the next group commit to the append-only ledger."""
+        if not self._pending:
+            self._pending_t0 = time.monotonic()
+        self._pending.append(jsonl_bytes(evt._as_dict()))
 
     def replay_ledger_for_dedup(self) -> None:
         """
-        Reconstruct accepted_payload_hashes from existing ledger.
+        Reconstruct accepted_payload_hashes (64-bit keys) from existing ledger.
         This is the REAL resume mechanism — not state.json, which is
         a convenience cache. Ledger is source of truth.
         """
         if not os.path.exists(self.ledger_path):
             return
-        with open(self.ledger_path, "r", encoding="utf-8") as f:
+        with open(self.ledger_path, "rb", buffering=1 << 20) as f:
             for line_num, line in enumerate(f, 1):
                 line = line.strip()
                 if not line:
                     continue
                 try:
-                    obj = json.loads(line)
+                    obj = json_loads(line)
                     payload = obj.get("payload")
                     if isinstance(payload, dict):
-                        ph = sha256_json(payload)
-                        self.accepted_payload_hashes.add(ph)
+                        # Ledgers written before payload_hash existed: recompute.
+                        ph = obj.get("payload_hash") or sha256_json(payload)
+                        self.accepted_payload_hashes.add(payload_key(ph))
                     self.seq = max(self.seq, int(obj.get("seq", 0)))
                 except (json.JSONDecodeError, KeyError, TypeError) as exc:
                     raise RuntimeError(
@@ -167,14 +236,17 @@ class SingleWriterOrchestrator:
                     "status": j.status,
                     "last_error": j.last_error,
                 }
+                if j.status == "PENDING":
+                    self._pending_jobs.append(j.job_id)
         self.save_state()
 
     def get_next_job(self) -> Optional[Job]:
         """Simple FIFO scheduler: return first PENDING job, mark RUNNING."""
-        for job_id, jd in self.state["jobs"].items():
+        while self._pending_jobs:
+            jd = self.state["jobs"][self._pending_jobs.popleft()]
             if jd["status"] == "PENDING":
                 jd["status"] = "RUNNING"
-                self.save_state()
+                self._state_dirty = True
                 return Job(**{k: jd[k] for k in Job.__dataclass_fields__})
         return None
 
@@ -182,7 +254,7 @@ class SingleWriterOrchestrator:
         """Mark job as completed."""
         self.state["jobs"][job_id]["status"] = "DONE"
         self.state["done"] += 1
-        self.save_state()
+        self._state_dirty = True
 
     def mark_job_failed(self, job_id: str, err: str) -> None:
         """Mark job failed. Retry if attempts < max_attempts, else FAILED."""
@@ -194,7 +266,8 @@ class SingleWriterOrchestrator:
             self.state["failed"] += 1
         else:
             jd["status"] = "PENDING"  # retry
-        self.save_state()
+            self._pending_jobs.append(job_id)
+        self._state_dirty = True
 
     # ─────────────── acceptance gate ───────────────
     def accept_result(
@@ -208,89 +281,180 @@ class SingleWriterOrchestrator:
           1. Schema validation
           2. Tolerance check (|root_val| < eps)
           3. Dedup by canonical hash
-          4. Atomic: append → mark → save
+          4. Atomic: append → mark (state flushed at checkpoint)
         """
         # Gate 1: Schema
         if not ResultPayload.validate(payload):
             self.state["rejected"] += 1
-            self.save_state()
+            self._state_dirty = True
             return "REJECTED_SCHEMA"
 
         # Gate 2: Tolerance
-        root_val = float(payload["root_val"])
-        if abs(root_val) > self.eps_root:
+        if abs(payload["root_val"]) > self.eps_root:
             self.state["rejected"] += 1
-            self.save_state()
+            self._state_dirty = True
             return "REJECTED_TOL"
 
         # Gate 3: Dedup
-        ph = sha256_json(payload)
-        if ph in self.accepted_payload_hashes:
+        payload_bytes, ph = sha256_json_bytes(payload)
+        key = payload_key(ph)
+        if key in self.accepted_payload_hashes:
             return "REJECTED_DUP"
 
         # Atomic acceptance
         self.seq += 1
-        evt = LedgerEvent.from_parts(self.run_id, worker_id, job_id, self.seq, payload)
+        evt = LedgerEvent.from_parts_precanon(
+            self.run_id, worker_id, job_id, self.seq, payload, payload_bytes, ph,
+        )
 
         self.append_ledger(evt)
-        self.accepted_payload_hashes.add(ph)
+        self.accepted_payload_hashes.add(key)
         self.state["seq"] = self.seq
-        self.save_state()
+        self._state_dirty = True
 
         return "ACCEPTED"
 
     # ─────────────── reducer loop ───────────────
     def reducer_loop(self) -> None:
         """
-        Single-threaded reducer: drains the queue and processes messages.
-        This is the ONLY code path that writes to the ledger.
+        Threaded reducer: drains the inbox and processes messages.
+        Harnesses that multiplex worker pipes in their own thread call
+        open_ledger / handle_message / close instead.
         """
-        accepted_since_ckpt = 0
-
-        while not self.stop_event.is_set():
-            item = self.q.get()
-            if item is None:
-                break
-
-            kind = item.get("kind")
-
-            if kind == "RESULT":
-                verdict = self.accept_result(
-                    worker_id=int(item["worker_id"]),
-                    job_id=str(item["job_id"]),
-                    payload=item["payload"],
-                )
-                if verdict == "ACCEPTED":
-                    accepted_since_ckpt += 1
-                    if item.get("job_done", False):
-                        self.mark_job_done(str(item["job_id"]))
-
-                # Checkpoint at interval
-                if accepted_since_ckpt >= self.checkpoint_every:
-                    ckpt_path = os.path.join(
-                        self.run_dir, "checkpoints",
-                        f"checkpoint_seq_{self.seq}.json",
-                    )
-                    with open(ckpt_path, "w", encoding="utf-8") as f:
-                        json.dump({
-                            "seq": self.seq,
-                            "done": self.state["done"],
-                            "failed": self.state["failed"],
-                        }, f)
-                    accepted_since_ckpt = 0
-
-            elif kind == "ERROR":
-                self.mark_job_failed(
-                    str(item["job_id"]),
-                    str(item.get("error", "unknown")),
-                )
+        self.open_ledger()
+        try:
+            while not self.stop_event.is_set():
+                item = self._next_item()
+                if item is None:
+                    break
+                self.handle_message(item)
+        finally:
+            self.close()
+
+    def handle_message(self, item: Dict[str, Any]) -> None:
+        """
+        Apply one worker message. The reducer's only entry point, and the
+        ONLY code path that writes to the ledger; call it from one thread.
+        """
+        kind = item.get("kind")
+
+        if kind == "RESULT_BATCH":
+            # Every payload goes through the gate; the last batch of a job
+            # closes it regardless of individual verdicts.
+            worker_id = int(item["worker_id"])
+            job_id = str(item["job_id"])
+            if "payloads" not in item:
+                # Columnar batch: copy the columns out and free the SHM block
+                item["ts"], item["rv"] = unpack_columns(item)
+            for payload in self._batch_payloads(item):
+                if self.accept_result(worker_id, job_id, payload) == "ACCEPTED":
+                    self._accepted_since_ckpt += 1
+                    if self._accepted_since_ckpt >= self.checkpoint_every:
+                        self.write_checkpoint()
+            if item.get("job_done", False):
+                self.mark_job_done(job_id)
+
+        elif kind == "RESULT":
+            verdict = self.accept_result(
+                worker_id=int(item["worker_id"]),
+                job_id=str(item["job_id"]),
+                payload=item["payload"],
+            )
+            if verdict == "ACCEPTED":
+                self._accepted_since_ckpt += 1
+            if item.get("job_done", False):
+                self.mark_job_done(str(item["job_id"]))
+
+            # Checkpoint at interval
+            if self._accepted_since_ckpt >= self.checkpoint_every:
+                self.write_checkpoint()
+
+        elif kind == "JOB_DONE":
+            # Completion-only sentinel (job produced no payloads)
+            self.mark_job_done(str(item["job_id"]))
+
+        elif kind == "ERROR":
+            self.mark_job_failed(
+                str(item["job_id"]),
+                str(item.get("error", "unknown")),
+            )
+
+    def group_commit_timeout(self) -> Optional[float]:
+        """Seconds until buffered events are due for commit; None if none are buffered."""
+        if not self._pending:
+            return None
+        return max(0.0, self._pending_t0 + self.group_commit_s - time.monotonic())
+
+    def close(self) -> None:
+        """Commit and close the ledger, then flush state if it changed."""
+        self.close_ledger()
+        self._save_state_maybe()
+
+    @staticmethod
+    def _batch_payloads(item: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the payloads of a RESULT_BATCH. Columnar batches reuse one
+        scratch dict: accept_result serializes a payload before the next
+        yield and keeps no reference to it.
+        """
+        payloads = item.get("payloads")
+        if payloads is not None:
+            yield from payloads
+            return
+        scratch = {"t": 0.0, "root_val": 0.0, "meta": item["meta"]}
+        for t, r in zip(item["ts"], item["rv"]):
+            scratch["t"] = t
+            scratch["root_val"] = r
+            yield scratch
+
+    def write_checkpoint(self) -> None:
+        """Group-commit the ledger, then write a durable checkpoint and flush state."""
+        # Ledger must be durable before a checkpoint claims its seq
+        self.flush_ledger()
+        self._accepted_since_ckpt = 0
+        ckpt_path = os.path.join(
+            self.run_dir, "checkpoints",
+            f"checkpoint_seq_{self.seq}.json",
+        )
+        with open(ckpt_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "seq": self.seq,
+                "done": self.state["done"],
+                "failed": self.state["failed"],
+            }, f)
+            f.flush()
+            _datasync(f.fileno())
+        self._save_state_maybe()
+
+    def _next_item(self) -> Optional[Dict[str, Any]]:
+        """
+        Pop the next inbox message, sleeping on the wakeup event while empty.
+        While idle with uncommitted events, commit them once group_commit_ms elapses.
+        """
+        while True:
+            try:
+                return self.q.popleft()
+            except IndexError:
+                # Clear before re-checking so an append+set in between is never lost
+                self._wakeup.clear()
+                if self.q:
+                    continue
+                remaining = self.group_commit_timeout()
+                if remaining is None:
+                    self._wakeup.wait()
+                elif remaining <= 0 or not self._wakeup.wait(remaining):
+                    self.flush_ledger()
 
     # ─────────────── worker interface ───────────────
     def submit_from_worker(self, msg: Dict[str, Any]) -> None:
         """Workers push messages here. Orchestrator drains them in reducer_loop."""
-        self.q.put(msg)
+        self.q.append(msg)
+        self._wakeup.set()
 
     def shutdown(self) -> None:
-        """Signal the reducer loop to exit."""
-        self.stop_event.set()
-        self.q.put(None)
+        """
+        Queue the stop sentinel behind every message already submitted.
+        The reducer drains them all, then syncs and closes the ledger.
+        """
+        self.q.append(None)
+        self._wakeup.set()
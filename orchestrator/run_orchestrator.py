@@ -9,69 +9,181 @@ Usage:
     python -m orchestrator.run_orchestrator
 """
 from __future__ import annotations
-from typing import List
+from itertools import count, islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
 import multiprocessing as mp
-import threading
+from multiprocessing.connection import Connection, wait
 import time
 import sys
 import os
+import zlib
 
 # Ensure parent directory is importable
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from orchestrator.contracts import Job
+from orchestrator.contracts import Job, json_bytes, json_loads
 from orchestrator.orchestrator import SingleWriterOrchestrator
-from orchestrator.worker_entry import compute_zero_candidates
+from orchestrator.shm_columns import pack_columns, run_prefix, sweep_blocks
+from orchestrator.worker_entry import (
+    STUB_META, RecentFilter, compute_zero_columns, concat_columns, make_rng,
+    n_samples,
+)
+
+
+# Worker batching: a batch ships once it holds MAX_BATCH samples or its
+# oldest sample has waited MAX_DELAY_MS, whichever comes first.
+MAX_BATCH = int(os.getenv("ORCH_MAX_BATCH", "256"))
+MAX_DELAY_S = float(os.getenv("ORCH_MAX_DELAY_MS", "50")) / 1000.0
+MINER_CHUNK = 64  # samples per miner call
+JOB_GROUP = 4  # jobs per job_q message
+
+
+def _env_seed() -> Optional[int]:
+    """Stub RNG seed from ORCH_SEED (each job's stream derives from it and
+    the job_id); unset = fresh entropy. Must be a non-negative integer."""
+    raw = os.getenv("ORCH_SEED")
+    if not raw:
+        return None
+    try:
+        seed = int(raw)
+    except ValueError:
+        seed = -1
+    if seed < 0:
+        raise SystemExit(f"ORCH_SEED must be a non-negative integer, got {raw!r}")
+    return seed
+
+
+def _grouped(items: Iterable[Any], n: int) -> Iterator[List[Any]]:
+    """itertools.batched (3.12+) for older interpreters, yielding lists."""
+    it = iter(items)
+    while group := list(islice(it, n)):
+        yield group
+
+
+def _send_batch(
+    out_conn: Connection,
+    worker_id: int,
+    job_id: str,
+    ts_parts: List[Sequence[float]],
+    rv_parts: List[Sequence[float]],
+    job_done: bool,
+    shm_name: Optional[str] = None,
+) -> None:
+    """One RESULT_BATCH: columns live in shared memory, only the block name,
+    the shared meta and the completion flag are sent."""
+    msg = {
+        "kind": "RESULT_BATCH",
+        "worker_id": worker_id,
+        "job_id": job_id,
+        "meta": dict(STUB_META),
+        "job_done": job_done,
+    }
+    msg.update(pack_columns(concat_columns(ts_parts), concat_columns(rv_parts), shm_name))
+    out_conn.send_bytes(json_bytes(msg))
+
+
+def _take_jobs(orch: SingleWriterOrchestrator, n: int) -> List[Job]:
+    """Up to n jobs from the orchestrator's pending queue (marked RUNNING)."""
+    jobs: List[Job] = []
+    while len(jobs) < n:
+        job = orch.get_next_job()
+        if job is None:
+            break
+        jobs.append(job)
+    return jobs
+
+
+def _finishes_job(msg: Dict[str, Any]) -> bool:
+    """True for the message that closes its job (done or failed)."""
+    kind = msg.get("kind")
+    if kind == "RESULT_BATCH":
+        return bool(msg.get("job_done", False))
+    return kind in ("JOB_DONE", "ERROR")
+
+
+def _send_job_done(out_conn: Connection, worker_id: int, job_id: str) -> None:
+    """Completion-only sentinel for a job with nothing (left) to ship."""
+    out_conn.send_bytes(json_bytes({
+        "kind": "JOB_DONE",
+        "worker_id": worker_id,
+        "job_id": job_id,
+    }))
 
 
 def worker_proc(
     worker_id: int,
     job_q: "mp.Queue",
-    out_q: "mp.Queue",
+    out_conn: Connection,
+    seed: Optional[int] = None,
+    shm_prefix: Optional[str] = None,
 ) -> None:
     """
-    Worker process: pulls jobs, computes candidates, streams results.
-    NEVER writes to disk. Only pushes to out_q.
+    Worker process: pulls job groups, mines each job in chunks, ships
+    size/time-bounded batches (the last one flagged job_done).
+    NEVER writes to disk. Only sends on its own one-way pipe (out_conn).
+    Messages go out as JSON bytes via send_bytes, bypassing the pickler.
+    seed makes a run reproducible: each job gets its own generator derived
+    from (seed, job_id), so values do not depend on which worker pulls which
+    job. None: one entropy-seeded generator for the worker's lifetime.
+    shm_prefix names this worker's shared-memory blocks so the parent can
+    sweep any it never read (see shm_columns).
     """
+    rng = make_rng()
+    shm_names = (
+        (f"{shm_prefix}{worker_id}_{k}" for k in count())
+        if shm_prefix is not None else None
+    )
+    recent = RecentFilter()  # spans jobs for the worker's lifetime
     while True:
-        job = job_q.get()
-        if job is None:
+        group = job_q.get()
+        if group is None:
             break  # poison pill
 
-        job_id, t_start, t_end, stride = job
-        try:
-            payloads = compute_zero_candidates(t_start, t_end, stride)
-
-            # Stream results one by one
-            for p in payloads:
-                out_q.put({
-                    "kind": "RESULT",
+        for job_id, t_start, t_end, stride in group:
+            try:
+                if seed is not None:
+                    rng = make_rng((seed << 32) | zlib.crc32(job_id.encode()))
+                n = n_samples(t_start, t_end, stride)
+                if n == 0:
+                    _send_job_done(out_conn, worker_id, job_id)
+                    continue
+
+                ts_parts: List[Sequence[float]] = []
+                rv_parts: List[Sequence[float]] = []
+                buffered = 0
+                t_first = 0.0
+                for lo in range(0, n, MINER_CHUNK):
+                    ts, rv = recent.filter(*compute_zero_columns(
+                        t_start, t_end, stride, rng, lo, lo + MINER_CHUNK,
+                    ))
+                    if len(ts):
+                        if not buffered:
+                            t_first = time.monotonic()
+                        ts_parts.append(ts)
+                        rv_parts.append(rv)
+                        buffered += len(ts)
+
+                    last = lo + MINER_CHUNK >= n
+                    if buffered and (last or buffered >= MAX_BATCH
+                                     or time.monotonic() - t_first >= MAX_DELAY_S):
+                        _send_batch(out_conn, worker_id, job_id,
+                                    ts_parts, rv_parts, job_done=last,
+                                    shm_name=next(shm_names) if shm_names else None)
+                        recent.commit()
+                        ts_parts, rv_parts, buffered = [], [], 0
+                    elif last:
+                        _send_job_done(out_conn, worker_id, job_id)
+            except Exception as e:
+                recent.rollback()
+                out_conn.send_bytes(json_bytes({
+                    "kind": "ERROR",
                     "worker_id": worker_id,
                     "job_id": job_id,
-                    "payload": p,
-                    "job_done": False,
-                })
-
-            # Signal job completion with the last payload
-            out_q.put({
-                "kind": "RESULT",
-                "worker_id": worker_id,
-                "job_id": job_id,
-                "payload": payloads[-1] if payloads else {
-                    "t": t_start, "root_val": 0.0, "meta": {"empty": True}
-                },
-                "job_done": True,
-            })
-        except Exception as e:
-            out_q.put({
-                "kind": "ERROR",
-                "worker_id": worker_id,
-                "job_id": job_id,
-                "error": repr(e),
-            })
-
-    # Worker signals exit
-    out_q.put({"kind": "WORKER_EXIT", "worker_id": worker_id})
+                    "error": repr(e),
+                }))
+
+    # Closing the write end is the exit signal: the parent sees EOF
+    out_conn.close()
 
 
 def main() -> None:
@@ -79,6 +191,7 @@ def main() -> None:
     run_dir = "run_latido"
     run_id = "Latido_20260220_SINGLE_ORCH"
     n_workers = min(4, os.cpu_count() or 2)
+    seed = _env_seed()
 
     print(f"+{'='*46}+", flush=True)
     print(f"|  SINGLE-ORCHESTRATOR / MULTI-WORKER ENGINE   |", flush=True)
@@ -92,6 +205,7 @@ def main() -> None:
         checkpoint_every=200,
     )
     orch.acquire_lock()
+    shm_prefix = run_prefix()
 
     try:
         # Resume from previous state + ledger replay
@@ -116,71 +230,81 @@ def main() -> None:
         total_jobs = len(orch.state["jobs"])
         print(f"[JOBS] {total_jobs} registered", flush=True)
 
-        # Multiprocessing queues
+        # Jobs fan out on a shared queue; results come back on one
+        # single-producer pipe per worker (no shared lock, no feeder thread)
         job_q: mp.Queue = mp.Queue()
-        out_q: mp.Queue = mp.Queue()
-
-        # Start reducer thread (single writer)
-        reducer_t = threading.Thread(target=orch.reducer_loop, daemon=True)
-        reducer_t.start()
 
         # Start worker processes
         workers = []
+        conns: List[Connection] = []
+        conn_worker: Dict[Connection, int] = {}
         for wid in range(n_workers):
+            parent_conn, child_conn = mp.Pipe(duplex=False)
             p = mp.Process(
                 target=worker_proc,
-                args=(wid, job_q, out_q),
+                args=(wid, job_q, child_conn, seed, shm_prefix),
                 daemon=True,
             )
             p.start()
+            child_conn.close()  # the worker holds the only write end
             workers.append(p)
-
-        # Phase 1: Dispatch all jobs
+            conns.append(parent_conn)
+            conn_worker[parent_conn] = wid
+
+        # Dispatch and reduce in one loop, in this thread (single writer).
+        # At most `window` jobs are in flight; finished jobs free slots, so a
+        # slow reducer throttles dispatch and retries re-enter naturally.
+        # wait() blocks until a pipe has data or hits EOF (a worker's write
+        # end closes when it exits, cleanly or not), or until buffered ledger
+        # events are due for group commit. It multiplexes pipe handles on
+        # Windows too, which selectors cannot.
+        window = 2 * n_workers
+        in_flight = 0
         dispatched = 0
-        while True:
-            job = orch.get_next_job()
-            if job is None:
-                break
-            job_q.put((job.job_id, job.t_start, job.t_end, job.stride))
-            dispatched += 1
-        print(f"[DISPATCH] {dispatched} jobs sent to workers", flush=True)
-
-        # Send poison pills to workers
-        for _ in workers:
-            job_q.put(None)
-
-        # Phase 2: Drain results until all workers exit
-        workers_exited = 0
+        draining = False  # poison pills sent
         drain_count = 0
-        while workers_exited < n_workers:
-            try:
-                msg = out_q.get(timeout=5.0)
-            except Exception:
-                # Check if workers are still alive
-                alive = sum(1 for p in workers if p.is_alive())
-                if alive == 0:
-                    break
-                continue
-
-            if msg.get("kind") == "WORKER_EXIT":
-                workers_exited += 1
-                print(f"  [EXIT] Worker {msg['worker_id']} finished", flush=True)
-            else:
-                orch.submit_from_worker(msg)
-                drain_count += 1
-                if drain_count % 100 == 0:
-                    print(f"  [DRAIN] {drain_count} messages processed, "
-                          f"seq={orch.state['seq']}", flush=True)
-
-        # Final drain — anything left in the queue
-        while True:
-            try:
-                msg = out_q.get_nowait()
-                if msg.get("kind") != "WORKER_EXIT":
-                    orch.submit_from_worker(msg)
+        orch.open_ledger()
+        try:
+            while conns:
+                if not draining:
+                    for group in _grouped(_take_jobs(orch, window - in_flight), JOB_GROUP):
+                        job_q.put([(j.job_id, j.t_start, j.t_end, j.stride) for j in group])
+                        in_flight += len(group)
+                        dispatched += len(group)
+                    if in_flight == 0:
+                        print(f"[DISPATCH] {dispatched} jobs sent to workers", flush=True)
+                        for _ in workers:
+                            job_q.put(None)
+                        draining = True
+
+                ready = wait(conns, orch.group_commit_timeout())
+                if not ready:
+                    orch.flush_ledger()
+                    continue
+
+                for conn in ready:
+                    try:
+                        msg = json_loads(conn.recv_bytes())
+                    except EOFError:
+                        conns.remove(conn)
+                        print(f"  [EXIT] Worker {conn_worker[conn]} finished", flush=True)
+                        if not draining:
+                            # Died mid-run: its jobs stay RUNNING (see README,
+                            # Resume). Stop feeding; the rest drain what is queued.
+                            for _ in workers:
+                                job_q.put(None)
+                            draining = True
+                        continue
+
+                    orch.handle_message(msg)
+                    if _finishes_job(msg):
+                        in_flight -= 1
                     drain_count += 1
-            except Exception:
-                break
+                    if drain_count % 100 == 0:
+                        print(f"  [DRAIN] {drain_count} messages processed, "
+                              f"seq={orch.state['seq']}", flush=True)
+        finally:
+            orch.close()
 
         print(f"[DRAIN] Total: {drain_count} messages processed", flush=True)
 
@@ -188,13 +312,6 @@ def main() -> None:
         for p in workers:
             p.join(timeout=5)
 
-        # Give reducer time to finish processing the queue
-        time.sleep(1.0)
-
-        # Shutdown reducer
-        orch.shutdown()
-        reducer_t.join(timeout=5)
-
         # Summary
         print(f"\n{'='*50}", flush=True)
         print(f"  DONE:     {orch.state['done']}", flush=True)
@@ -205,6 +322,10 @@ def main() -> None:
         print(f"{'='*50}", flush=True)
 
     finally:
+        # Result blocks a worker created but the reducer never unpacked
+        swept = sweep_blocks(shm_prefix)
+        if swept:
+            print(f"[SHM] Swept {swept} unread result blocks", flush=True)
         orch.release_lock()
         print("[LOCK] Released.", flush=True)
 
@@ -0,0 +1,120 @@
+# orchestrator/shm_columns.py
+"""
+Shared-memory column transport — worker → orchestrator.
+
+A batch of (t, root_val) samples travels as one float64 block laid out
+SoA: n t values followed by n root_val values. Only the block name and
+n cross the pipe; the orchestrator copies the columns out and unlinks.
+
+On Windows a block dies with its last open handle, so the worker cannot
+close it before the orchestrator attaches. There (and for empty
+batches) the columns are sent inline as float lists. Either form is
+JSON-serializable, so the message can skip the pickler.
+
+Ownership: once the worker has packed a block, no process tracks it until
+the orchestrator unpacks it. A block leaks in /dev/shm if the worker dies
+between create and send, or the orchestrator stops before unpacking. Workers
+therefore name blocks under a per-run prefix (see run_prefix) and the
+orchestrator calls sweep_blocks(prefix) on shutdown. A SIGKILLed
+orchestrator still leaks its unread blocks.
+"""
+from __future__ import annotations
+from array import array
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import os
+import sys
+
+_SHM_OK = os.name != "nt"
+_SHM_DIR = "/dev/shm"  # where Linux exposes POSIX shared memory
+# 3.13+: create the block untracked instead of unregistering it afterwards
+_UNTRACKED = sys.version_info >= (3, 13)
+
+
+def run_prefix() -> str:
+    """Block-name prefix for this orchestrator run (pid: unique among live processes)."""
+    return f"orch{os.getpid()}_"
+
+
+def pack_columns(ts: Sequence[float], rv: Sequence[float],
+                 name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Worker side. Returns the message fields describing the batch.
+    Ownership of the block passes to whoever calls unpack_columns().
+    `name` (run_prefix() + a per-worker counter) lets sweep_blocks() find
+    the block if it is never unpacked; None picks a random name.
+    """
+    n = len(ts)
+    if n == 0 or not _SHM_OK:
+        return {"columns": [_floats(ts), _floats(rv)]}
+
+    if _UNTRACKED:
+        shm = shared_memory.SharedMemory(name=name, create=True, size=16 * n, track=False)
+    else:
+        shm = shared_memory.SharedMemory(name=name, create=True, size=16 * n)
+    try:
+        col = shm.buf.cast("d")
+        col[:n] = _doubles(ts)
+        col[n:2 * n] = _doubles(rv)
+        col.release()
+    finally:
+        shm.close()
+    if not _UNTRACKED:
+        # The receiver unlinks; stop this process's tracker from reaping it.
+        # Pre-3.13 there is no public way to skip tracking (_name is the tracked name).
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return {"shm": shm.name, "n": n}
+
+
+def unpack_columns(msg: Dict[str, Any]) -> Tuple[List[float], List[float]]:
+    """Orchestrator side. Copies the columns out and frees the block."""
+    cols = msg.get("columns")
+    if cols is not None:
+        return cols[0], cols[1]
+
+    n = int(msg["n"])
+    shm = shared_memory.SharedMemory(name=msg["shm"])
+    try:
+        col = shm.buf.cast("d")
+        ts = col[:n].tolist()
+        rv = col[n:2 * n].tolist()
+        col.release()
+    finally:
+        shm.close()
+        shm.unlink()
+    return ts, rv
+
+
+def sweep_blocks(prefix: str) -> int:
+    """
+    Orchestrator side, at shutdown: unlink blocks named `prefix`* that were
+    never unpacked. Returns how many. Needs a listable /dev/shm (Linux);
+    a no-op elsewhere.
+    """
+    try:
+        names = os.listdir(_SHM_DIR)
+    except OSError:
+        return 0
+    swept = 0
+    for entry in names:
+        if entry.startswith(prefix):
+            try:
+                os.unlink(os.path.join(_SHM_DIR, entry))
+                swept += 1
+            except FileNotFoundError:
+                pass
+    return swept
+
+
+def _doubles(values: Sequence[float]) -> Any:
+    """Zero-copy view of a float64 ndarray, or an array('d') copy of a list."""
+    try:
+        return memoryview(values)
+    except TypeError:
+        return array("d", values)
+
+
+def _floats(values: Sequence[float]) -> List[float]:
+    """Plain Python floats (ndarray scalars are not JSON-serializable)."""
+    tolist = getattr(values, "tolist", None)
+    return tolist() if tolist is not None else list(values)
@@ -9,15 +9,149 @@ decides acceptance, dedup, and persistence.
 TODO: Replace compute_zero_candidates() with your real miner logic.
 """
 from __future__ import annotations
-from typing import Dict, Any, List
+from collections import deque
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Deque, Dict, Any, List, Mapping, Optional, Sequence, Set, Tuple
 import random
-import time
+from orchestrator.shm_columns import _floats
+
+try:
+    import numpy as np
+except ImportError:  # optional accelerator; pure-Python columns are the fallback
+    np = None
+
+# Shared by every payload of the stub; shipped once per batch. Read-only
+# view: serializers need a real dict, so take one copy per batch/call.
+STUB_META: Mapping[str, Any] = MappingProxyType({"method": "stub", "iters": 12})
+
+
+def make_rng(seed: Optional[int] = None) -> Any:
+    """
+    Per-worker generator: NumPy's PCG64 (default_rng) when available,
+    else a private random.Random. seed=None draws from OS entropy.
+    """
+    if np is not None:
+        return np.random.default_rng(seed)
+    return random.Random(seed)
+
+
+@lru_cache(maxsize=4)
+def _t_grid(t_start: float, t_end: float, stride: float) -> Sequence[float]:
+    """
+    Sample t values in [t_start, t_end), stepped by repeated addition like
+    the original scalar loop: t_start + i * stride rounds differently, and
+    any change to t changes payload hashes against existing ledgers.
+    Cached (read-only) because a job is mined in chunks over one grid.
+    """
+    t_start, stride = float(t_start), float(stride)
+    ts: List[float] = []
+    if stride > 0:
+        t = t_start
+        while t < t_end:
+            ts.append(t)
+            t += stride
+    if np is not None:
+        arr = np.array(ts, dtype=np.float64)
+        arr.flags.writeable = False
+        return arr
+    return tuple(ts)
+
+
+def n_samples(t_start: float, t_end: float, stride: float) -> int:
+    """Number of samples in [t_start, t_end) at the given stride."""
+    return len(_t_grid(t_start, t_end, stride))
+
+
+def compute_zero_columns(
+    t_start: float,
+    t_end: float,
+    stride: float,
+    rng: Any = None,
+    lo: int = 0,
+    hi: Optional[int] = None,
+) -> Tuple[Sequence[float], Sequence[float]]:
+    """
+    Columnar (SoA) form of the stub miner: (t values, root_val values).
+
+    Uses one vectorized pass when NumPy is available, otherwise a list
+    comprehension. t values come from the job's cached grid (see _t_grid);
+    lo/hi select the sample range [lo, hi) so a long window can be mined
+    in chunks. rng comes from make_rng(); workers create one and reuse it
+    per job.
+    """
+    if rng is None:
+        rng = make_rng()
+    ts = _t_grid(t_start, t_end, stride)[lo:hi]
+    if np is not None:
+        # Placeholder: small root_val means "acceptable zero"
+        rv = (rng.random(ts.size) - 0.5) * 1e-11
+        return ts, rv
+    rnd = rng.random
+    ts = list(ts)
+    rv = [(rnd() - 0.5) * 1e-11 for _ in ts]
+    return ts, rv
+
+
+def concat_columns(parts: List[Sequence[float]]) -> Sequence[float]:
+    """Join column chunks produced by compute_zero_columns."""
+    if np is not None:
+        return np.concatenate(parts)
+    return [x for part in parts for x in part]
+
+
+class RecentFilter:
+    """
+    Worker-side dedup of the last `size` (t, root_val) pairs this worker
+    shipped, so repeats never cost IPC or reducer time. Best effort only:
+    the orchestrator's hash gate stays authoritative.
+    Kept pairs stay pending until commit() (their batch was sent) or
+    rollback() (it was not), so a failed send never hides a pair.
+    """
+
+    def __init__(self, size: int = 10_000) -> None:
+        self._size = size
+        self._order: Deque[Tuple[float, float]] = deque()
+        self._seen: Set[Tuple[float, float]] = set()
+        self._pending: Dict[Tuple[float, float], None] = {}  # insertion-ordered
+
+    def filter(
+        self, ts: Sequence[float], rv: Sequence[float],
+    ) -> Tuple[Sequence[float], Sequence[float]]:
+        """Drop shipped or pending pairs; columns come back unchanged if none repeat."""
+        seen, pending = self._seen, self._pending
+        keep: List[int] = []
+        for i, key in enumerate(zip(_floats(ts), _floats(rv))):
+            if key in seen or key in pending:
+                continue
+            pending[key] = None
+            keep.append(i)
+        if len(keep) == len(ts):
+            return ts, rv
+        if np is not None and isinstance(ts, np.ndarray):
+            return ts[keep], rv[keep]
+        return [ts[i] for i in keep], [rv[i] for i in keep]
+
+    def commit(self) -> None:
+        """Record the pending pairs as shipped; call after their batch is sent."""
+        seen, order = self._seen, self._order
+        for key in self._pending:
+            seen.add(key)
+            order.append(key)
+            if len(order) > self._size:
+                seen.discard(order.popleft())
+        self._pending.clear()
+
+    def rollback(self) -> None:
+        """Forget the pending pairs; their batch never left the worker."""
+        self._pending.clear()
 
 
 def compute_zero_candidates(
     t_start: float,
     t_end: float,
     stride: float,
+    rng: Any = None,
 ) -> List[Dict[str, Any]]:
     """
     Stub miner — replace with your real zero-finding engine.
@@ -28,16 +162,8 @@ def compute_zero_candidates(
     The orchestrator validates schema + tolerance + uniqueness.
     The worker does NOT need to worry about dedup.
     """
-    out: List[Dict[str, Any]] = []
-    t = t_start
-    while t < t_end:
-        # Placeholder: small root_val means "acceptable zero"
-        root_val = (random.random() - 0.5) * 1e-11
-        out.append({
-            "t": float(t),
-            "root_val": float(root_val),
-            "meta": {"method": "stub", "iters": 12},
-        })
-        t += stride
-        time.sleep(0.001)  # simulate compute cost
-    return out
+    ts, rv = compute_zero_columns(t_start, t_end, stride, rng)
+    if np is not None:
+        ts, rv = ts.tolist(), rv.tolist()  # plain floats for the JSON ledger
+    meta = dict(STUB_META)  # one dict referenced by every payload
+    return [{"t": t, "root_val": r, "meta": meta} for t, r in zip(ts, rv)]
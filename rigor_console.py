@@ -3,14 +3,13 @@ from __future__ import annotations
 import time
 import sqlite3
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from typing import TYPE_CHECKING, Any, Optional, Tuple
 
 import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
 
-# Configuration for the Gahenax UI
-st.set_option('deprecation.showPyplotGlobalUse', False)
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
 
 @dataclass
 class DBConfig:
@@ -18,53 +17,146 @@ class DBConfig:
     table: str = "ua_ledger"
 
 
-def read_ledger(db: DBConfig, limit: int = 5000) -> pd.DataFrame:
-    if not os.path.exists(db.path):
+# float32/int8 halve what pandas and the plots carry; precision is ample for display
+_LEDGER_DTYPES = {
+    "contract_valid": "int8",
+    "ua_spend": "float32",
+    "delta_s": "float32",
+    "delta_s_per_ua": "float32",
+    "latency_ms": "float32",
+    "h_rigidity": "float32",
+    "work_units": "float32",
+}
+
+# format="ISO8601" exists from pandas 2.0; 1.x would read it as a literal
+# strftime pattern and coerce every timestamp to NaT, so let it infer there
+_TS_FORMAT = {"format": "ISO8601"} if int(pd.__version__.split(".")[0]) >= 2 else {}
+
+
+@st.cache_resource
+def _ledger_conn(path: str) -> sqlite3.Connection:
+    """One connection per DB path, shared across reruns and sessions."""
+    con = sqlite3.connect(path, check_same_thread=False)
+    con.execute("PRAGMA mmap_size=268435456")
+    con.execute("PRAGMA cache_size=-65536")
+    return con
+
+
+@st.cache_data(max_entries=8)
+def read_ledger(path: str, table: str, limit: int = 5000, window: int = 0) -> pd.DataFrame:
+    """
+    Newest `limit` rows, oldest first. `window` only keys the cache: pass
+    int(time.time() // refresh_s) so data is re-read once per interval.
+    """
+    if not os.path.exists(path):
         return pd.DataFrame()
-    con = sqlite3.connect(db.path)
-    try:
-        # Pull newest rows
-        q = f"""
-        SELECT
-            id, timestamp_start, timestamp_end, user_id, session_id, request_id,
-            engine_version, contract_version,
-            ua_spend, delta_s, delta_s_per_ua,
-            latency_ms, contract_valid, h_rigidity, work_units, evidence_hash
-        FROM {db.table}
-        ORDER BY id DESC
-        LIMIT ?
-        """
-        df = pd.read_sql_query(q, con, params=(limit,))
-    finally:
-        con.close()
+    # Pull newest rows
+    q = f"""
+    SELECT
+        id, timestamp_start, timestamp_end, user_id, session_id, request_id,
+        engine_version, contract_version,
+        ua_spend, delta_s, delta_s_per_ua,
+        latency_ms, contract_valid, h_rigidity, work_units, evidence_hash
+    FROM {table}
+    ORDER BY id DESC
+    LIMIT ?
+    """
+    df = pd.read_sql_query(q, _ledger_conn(path), params=(limit,))
 
     if df.empty:
         return df
 
-    # Normalize types
-    df["timestamp_end"] = pd.to_datetime(df["timestamp_end"], errors="coerce", utc=True)
-    df["contract_valid"] = df["contract_valid"].astype(int)
+    # Normalize types once: ISO-8601 fast path (utc_now() writes isoformat()
+    # with microseconds and offset), compact numeric dtypes for the plots
+    df["timestamp_end"] = pd.to_datetime(
+        df["timestamp_end"], errors="coerce", utc=True, **_TS_FORMAT,
+    )
+    df = df.astype(_LEDGER_DTYPES)
     df = df.sort_values("id")  # oldest -> newest for time plots
     return df
 
 
-def pctl(series: pd.Series, q: float) -> float:
-    s = series.dropna()
-    if s.empty:
-        return float("nan")
-    return float(s.quantile(q))
+_PANEL_COLS = ("latency_ms", "ua_spend", "delta_s_per_ua")
+
+
+def _quantile_sql(col: str, q: float) -> str:
+    """
+    Linear-interpolated quantile (pandas' default) of `col`, as an aggregate
+    over rows carrying {col}_i (0-based rank, NULLs last) and {col}_n (non-NULL count).
+    """
+    n, i = f"{col}_n", f"{col}_i"
+    pos = f"(({n} - 1) * {q!r})"
+    lo = f"CAST({pos} AS INTEGER)"
+    a = f"MAX(CASE WHEN {i} = {lo} THEN {col} END)"
+    b = f"MAX(CASE WHEN {i} = MIN({lo} + 1, {n} - 1) THEN {col} END)"
+    return f"{a} + ({b} - {a}) * MAX({pos} - {lo})"
+
+
+def _panel_sql(table: str) -> str:
+    """One statement: project the window once, rank each column, aggregate."""
+    ranked = ",\n            ".join(
+        f"ROW_NUMBER() OVER (ORDER BY {c} IS NULL, {c}) - 1 AS {c}_i, "
+        f"COUNT({c}) OVER () AS {c}_n"
+        for c in _PANEL_COLS
+    )
+    return f"""
+    WITH w AS (
+        SELECT {", ".join(_PANEL_COLS)}, contract_valid
+        FROM {table} ORDER BY id DESC LIMIT ?
+    ), r AS (
+        SELECT *,
+            {ranked}
+        FROM w
+    )
+    SELECT
+        {_quantile_sql("latency_ms", 0.50)},
+        {_quantile_sql("latency_ms", 0.95)},
+        AVG(contract_valid),
+        {_quantile_sql("ua_spend", 0.50)},
+        {_quantile_sql("delta_s_per_ua", 0.50)}
+    FROM r
+    """
 
 
-def metric_panel(df: pd.DataFrame) -> Tuple[float, float, float, float, float]:
-    lat_p50 = pctl(df["latency_ms"], 0.50)
-    lat_p95 = pctl(df["latency_ms"], 0.95)
-    pass_rate = float(df["contract_valid"].mean()) if len(df) else float("nan")
-    ua_med = pctl(df["ua_spend"], 0.50)
-    dsua_med = pctl(df["delta_s_per_ua"], 0.50) if "delta_s_per_ua" in df else float("nan")
+def _as_float(v: Any) -> float:
+    return float("nan") if v is None else float(v)
+
+
+@st.cache_data(max_entries=8)
+def metric_panel_sql(
+    path: str, table: str, limit: int = 5000, window: int = 0,
+) -> Tuple[float, float, float, float, float]:
+    """
+    Top-panel scalars computed inside SQLite over the same window as
+    read_ledger, in a single statement: only five floats cross into Python.
+    """
+    row = _ledger_conn(path).execute(_panel_sql(table), (limit,)).fetchone()
+    lat_p50, lat_p95, pass_rate, ua_med, dsua_med = map(_as_float, row)
     return lat_p50, lat_p95, pass_rate, ua_med, dsua_med
 
 
+def timeseries_chart(container: Any, df: pd.DataFrame, y: str, title: str) -> None:
+    """Native (Vega-Lite) line chart: rendered client-side, no server figure."""
+    d = df.dropna(subset=["timestamp_end", y])
+    container.caption(title)
+    container.line_chart(d.set_index("timestamp_end")[y])
+
+
+def hist_chart(container: Any, df: pd.DataFrame, col: str, title: str, bins: int = 30) -> None:
+    """Native bar chart of bin counts, indexed by bin midpoint."""
+    d = df[col].dropna()
+    container.caption(title)
+    if d.empty:
+        return
+    counts = pd.cut(d, bins=bins).value_counts(sort=False)
+    counts.index = [iv.mid for iv in counts.index]
+    container.bar_chart(counts)
+
+
+# Matplotlib versions, kept for exported reports (not used by the live console)
 def fig_timeseries(df: pd.DataFrame, y: str, title: str) -> plt.Figure:
+    import matplotlib.pyplot as plt
+
     fig = plt.figure(figsize=(10, 4))
     ax = fig.add_subplot(111)
     d = df.dropna(subset=["timestamp_end", y])
@@ -78,6 +170,8 @@ def fig_timeseries(df: pd.DataFrame, y: str, title: str) -> plt.Figure:
 
 
 def fig_hist(df: pd.DataFrame, col: str, title: str, bins: int = 30) -> plt.Figure:
+    import matplotlib.pyplot as plt
+
     fig = plt.figure(figsize=(10, 4))
     ax = fig.add_subplot(111)
     d = df[col].dropna()
@@ -116,7 +210,8 @@ def main() -> None:
 
     db = DBConfig(path=db_path)
 
-    df = read_ledger(db, limit=limit)
+    window = int(time.time() // refresh_s)
+    df = read_ledger(db.path, db.table, limit=limit, window=window)
 
     # Hard Gates
     st.header("1. Hard Sovereignty Gates")
@@ -134,7 +229,9 @@ def main() -> None:
         st.stop()
 
     # Top metrics panel
-    lat_p50, lat_p95, pass_rate, ua_med, dsua_med = metric_panel(df)
+    lat_p50, lat_p95, pass_rate, ua_med, dsua_med = metric_panel_sql(
+        db.path, db.table, limit=limit, window=window,
+    )
     c1, c2, c3, c4, c5 = st.columns(5)
     
     # Latency formatting: use ms or µs
@@ -162,23 +259,23 @@ def main() -> None:
     with tab1:
         st.subheader("Claim A2: Constant Latency & Schema Adherence")
         l_col, r_col = st.columns(2)
-        l_col.pyplot(fig_timeseries(df, "latency_ms", "Latency Drift (ms)"), clear_figure=True)
-        r_col.pyplot(fig_hist(df, "latency_ms", "Latency Distribution (ms)"), clear_figure=True)
+        timeseries_chart(l_col, df, "latency_ms", "Latency Drift (ms)")
+        hist_chart(r_col, df, "latency_ms", "Latency Distribution (ms)")
 
     with tab2:
         st.subheader("Claim A1/A4: Work Reduction & UA Efficiency")
         l_col, r_col = st.columns(2)
-        l_col.pyplot(fig_timeseries(df, "delta_s_per_ua", "Efficiency over time (ΔS/UA)"), clear_figure=True)
-        r_col.pyplot(fig_hist(df, "delta_s_per_ua", "Efficiency Distribution"), clear_figure=True)
+        timeseries_chart(l_col, df, "delta_s_per_ua", "Efficiency over time (ΔS/UA)")
+        hist_chart(r_col, df, "delta_s_per_ua", "Efficiency Distribution")
         
-        st.pyplot(fig_timeseries(df, "work_units", "Work Units (Processed logical dimensions)"), clear_figure=True)
+        timeseries_chart(st, df, "work_units", "Work Units (Processed logical dimensions)")
 
     with tab3:
         st.subheader("Claim A3: Chronos-Hodge Structural Stability")
         if df["h_rigidity"].notna().any():
             l_col, r_col = st.columns(2)
-            l_col.pyplot(fig_timeseries(df, "h_rigidity", "H-Rigidity Index (Stochasticity)"), clear_figure=True)
-            r_col.pyplot(fig_hist(df, "h_rigidity", "Rigidity Distribution"), clear_figure=True)
+            timeseries_chart(l_col, df, "h_rigidity", "H-Rigidity Index (Stochasticity)")
+            hist_chart(r_col, df, "h_rigidity", "Rigidity Distribution")
         else:
             st.info("Insufficient H-Rigidity data in current window.")
 
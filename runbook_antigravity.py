@@ -10,9 +10,10 @@ Usage:
 
 from __future__ import annotations
 
+import sys
 
-def main() -> None:
-    runbook = r"""# Antigravity Runbook: Gahenax Convergence (Core v1.1.1 + LLM Bridge)
+# Module constant: built once at compile time, stored as-is in the .pyc
+RUNBOOK = r"""# Antigravity Runbook: Gahenax Convergence (Core v1.1.1 + LLM Bridge)
 
 Version: 1.0
 Scope: Production operations for governed inference with fail-closed behavior, sealed ledger, and schema enforcement.
@@ -424,7 +425,11 @@ Note: Replace with your actual entrypoints and tooling.
 
 End of Runbook
 """
-    print(runbook)
+
+
+def main() -> None:
+    # Raw UTF-8 bytes: no print() encoding step, same output under redirects
+    sys.stdout.buffer.write(RUNBOOK.encode("utf-8") + b"\n")
 
 
 if __name__ == "__main__":
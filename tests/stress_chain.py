@@ -1,30 +1,112 @@
 from __future__ import annotations
 
 import argparse
+import functools
 import hashlib
 import json
 import os
+import queue
 import random
+import re
 import sqlite3
 import string
+import threading
 import time
-from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
 
 
 # -----------------------------
 # Helpers
 # -----------------------------
 
+def utc_iso(ns: int) -> str:
+    """
+    Epoch nanoseconds -> the string datetime.isoformat() gives for the same
+    UTC instant (microseconds omitted when zero), without building a datetime.
+    """
+    sec, us = divmod(ns // 1000, 1_000_000)
+    tm = time.gmtime(sec)
+    frac = f".{us:06d}" if us else ""
+    return (f"{tm.tm_year:04d}-{tm.tm_mon:02d}-{tm.tm_mday:02d}"
+            f"T{tm.tm_hour:02d}:{tm.tm_min:02d}:{tm.tm_sec:02d}{frac}+00:00")
+
 def utc_now() -> str:
-    return datetime.now(timezone.utc).isoformat()
+    return utc_iso(time.time_ns())
+
+# Built once: json.dumps() with non-default options constructs a fresh
+# encoder per call. Stays on stdlib json so hashes match the CMR writer
+# byte for byte (orjson formats some floats differently, e.g. 1e-05).
+_canonical_encode = json.JSONEncoder(sort_keys=True, separators=(",", ":")).encode
+# OpenSSL-backed constructor: dispatches to SHA-NI at runtime when the CPU
+# has it, and beats the builtin _sha256 module on these small payloads.
+_sha256 = hashlib.sha256
 
 def canonical_hash(payload: Dict[str, Any]) -> str:
     canon = dict(payload)
     canon.pop("evidence_hash", None)
-    blob = json.dumps(canon, sort_keys=True, separators=(",", ":")).encode("utf-8")
-    return hashlib.sha256(blob).hexdigest()
+    blob = _canonical_encode(canon).encode("utf-8")
+    return _sha256(blob).hexdigest()
+
+# Fields that make up the canonical payload (evidence_hash is blanked before hashing)
+CANONICAL_COLS: Tuple[str, ...] = (
+    "timestamp_start", "timestamp_end",
+    "user_id", "session_id", "request_id",
+    "engine_version", "contract_version",
+    "git_commit", "host_id",
+    "seed", "latency_ms",
+    "contract_valid", "contract_fail_reason",
+    "ua_spend", "delta_s", "delta_s_per_ua",
+    "h_rigidity", "work_units",
+    "prev_hash",
+    "evidence_hash",
+)
+_HASHED_COLS = CANONICAL_COLS[:-1]
+
+_json_str = json.encoder.encode_basestring_ascii
+
+def _json_value(v: Any) -> str:
+    # Same text json.dumps() emits for a scalar; anything unusual falls back to it
+    t = type(v)
+    if t is str:
+        return _json_str(v)
+    if t is int:
+        return int.__repr__(v)
+    if t is float and v - v == 0.0:  # finite
+        return float.__repr__(v)
+    return _canonical_encode(v)
+
+@functools.lru_cache(maxsize=16)
+def canonical_encoder(fields: Tuple[str, ...], as_bool: FrozenSet[str] = frozenset()) -> Callable[..., bytes]:
+    """
+    Generated straight-line encoder for a fixed field set: takes the values of
+    `fields` positionally and returns exactly _canonical_encode(dict(zip(fields, values)))
+    as UTF-8 bytes, with the key order and separators baked in at build time.
+    Fields in `as_bool` are encoded as JSON booleans (bool(value)).
+    """
+    args = ", ".join(f"a{i}" for i in range(len(fields)))
+    src = f"def encode({args}):\n    return {_canonical_expr(fields, as_bool)}\n"
+    return _compile(src, "encode")
+
+def _canonical_expr(fields: Tuple[str, ...], as_bool: FrozenSet[str]) -> str:
+    # Source of an expression over a0..aN (the values of `fields`) giving the canonical bytes
+    pos = {f: i for i, f in enumerate(fields)}
+    parts: List[str] = []
+    lit = "{"
+    for k in sorted(fields):
+        parts.append(repr(lit + _canonical_encode(k) + ":"))
+        a = f"a{pos[k]}"
+        parts.append(f'("true" if {a} else "false")' if k in as_bool else f"_v({a})")
+        lit = ","
+    parts.append(repr("}" if fields else "{}"))
+    return f"''.join(({', '.join(parts)},)).encode('ascii')"
+
+def _compile(src: str, name: str) -> Callable[..., Any]:
+    ns: Dict[str, Any] = {"_v": _json_value, "_sha256": _sha256}
+    exec(src, ns)
+    return ns[name]
 
 def rand_id(n: int = 12) -> str:
     return "".join(random.choice(string.ascii_lowercase + string.digits) for _ in range(n))
@@ -34,25 +116,75 @@ def rand_id(n: int = 12) -> str:
 # DB config
 # -----------------------------
 
+_TABLE_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
 @dataclass
 class DB:
+    """
+    Ledger location. The table name is spliced into SQL text, so it must be
+    a plain identifier; every statement is formatted once here and reused
+    verbatim, which keeps sqlite's per-connection statement cache hitting.
+    """
     path: str
     table: str = "ua_ledger"
+    sql_pragma: str = field(init=False, repr=False)
+    sql_last: str = field(init=False, repr=False)
+    sql_links: str = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if not _TABLE_RE.fullmatch(self.table):
+            raise ValueError(f"Nombre de tabla inválido: {self.table!r}")
+        self.sql_pragma = f"PRAGMA table_info({self.table})"
+        self.sql_last = f"SELECT evidence_hash FROM {self.table} ORDER BY id DESC LIMIT 1"
+        self.sql_links = f"SELECT prev_hash, evidence_hash FROM {self.table} ORDER BY id ASC"
+
+    # Column-dependent statements: built on first use (the table must exist by then)
+
+    @functools.cached_property
+    def insert_fields(self) -> Tuple[str, ...]:
+        # Only columns that exist are used (lets this work across minor schema variants)
+        present = set(get_columns(self))
+        return tuple(c for c in CANONICAL_COLS if c in present)
+
+    @functools.cached_property
+    def sql_insert(self) -> str:
+        fields = self.insert_fields
+        return (f"INSERT INTO {self.table} ({','.join(fields)}) "
+                f"VALUES ({','.join('?' * len(fields))})")
+
+    @functools.cached_property
+    def chain_cols(self) -> Tuple[str, ...]:
+        """id + the canonical columns this table actually has, in canonical order."""
+        return ("id",) + self.insert_fields
+
+    @functools.cached_property
+    def sql_chain(self) -> str:
+        # Project only what verification reads, not SELECT *
+        return f"SELECT {','.join(self.chain_cols)} FROM {self.table} WHERE id > ? ORDER BY id ASC"
+
+    @functools.cached_property
+    def sql_chain_limit(self) -> str:
+        return self.sql_chain + " LIMIT ?"
 
 
 # -----------------------------
 # Introspection
 # -----------------------------
 
-def get_columns(db: DB) -> List[str]:
-    con = sqlite3.connect(db.path)
+@functools.lru_cache(maxsize=8)
+def _table_columns(path: str, sql_pragma: str) -> Tuple[str, ...]:
+    # Schema is fixed for the life of a run: introspect once per (path, table)
+    con = sqlite3.connect(path)
     try:
-        rows = con.execute(f"PRAGMA table_info({db.table})").fetchall()
+        rows = con.execute(sql_pragma).fetchall()
         # row: (cid, name, type, notnull, dflt_value, pk)
-        return [r[1] for r in rows]
+        return tuple(r[1] for r in rows)
     finally:
         con.close()
 
+def get_columns(db: DB) -> List[str]:
+    return list(_table_columns(db.path, db.sql_pragma))
+
 def table_exists(db: DB) -> bool:
     con = sqlite3.connect(db.path)
     try:
@@ -70,15 +202,39 @@ def table_exists(db: DB) -> bool:
 # Match your CMR v1 schema fields.
 # -----------------------------
 
-def insert_synthetic_event(db: DB, prev_hash: Optional[str], engine_version: str, contract_version: str) -> str:
+# contract_valid is hashed as a JSON bool (the DB stores 0/1). If your canonical
+# implementation hashes 0/1 as-is, drop it from _AS_BOOL.
+_AS_BOOL = frozenset({"contract_valid"})
+
+@functools.lru_cache(maxsize=8)
+def row_emitter(insert_fields: Tuple[str, ...]) -> Callable[..., Tuple[str, Tuple[Any, ...]]]:
     """
-    Inserts a synthetic row following the CMR v1 pattern:
-      - computes evidence_hash deterministically
-      - includes prev_hash chaining
-    Returns the new evidence_hash.
+    Fused hash + SQL args for synthetic events: takes the _HASHED_COLS values
+    positionally and, in one straight-line pass, returns (evidence_hash,
+    execute() args in `insert_fields` order), with no payload dict.
     """
-    ts0 = utc_now()
-    t0 = time.perf_counter()
+    pos = {f: i for i, f in enumerate(_HASHED_COLS)}
+    sql_args: List[str] = []
+    for f in insert_fields:
+        if f == "evidence_hash":
+            sql_args.append("eh")
+        elif f == "contract_valid":
+            # If stored as int in sqlite, convert (some schemas store 0/1)
+            sql_args.append(f"(1 if a{pos[f]} else 0)")
+        else:
+            sql_args.append(f"a{pos[f]}")
+    args = ", ".join(f"a{i}" for i in range(len(_HASHED_COLS)))
+    src = (f"def emit({args}):\n"
+           f"    eh = _sha256({_canonical_expr(_HASHED_COLS, _AS_BOOL)}).hexdigest()\n"
+           f"    return eh, ({''.join(a + ', ' for a in sql_args)})\n")
+    return _compile(src, "emit")
+
+def synthetic_event_values(prev_hash: Optional[str], engine_version: str, contract_version: str) -> Tuple[Any, ...]:
+    """
+    Builds a synthetic row following the CMR v1 pattern; its field values,
+    in _HASHED_COLS order. row_emitter() adds the chained evidence_hash.
+    """
+    ns0 = time.time_ns()
 
     # simulate work
     ua_spend = random.randint(1, 50)
@@ -89,128 +245,148 @@ def insert_synthetic_event(db: DB, prev_hash: Optional[str], engine_version: str
     contract_valid = 1
     fail_reason = None
 
-    # precise end timestamp
-    time.sleep(0.0)
-    ts1 = utc_now()
-    latency_ms = (time.perf_counter() - t0) * 1000.0
-
-    payload = {
-        "timestamp_start": ts0,
-        "timestamp_end": ts1,
-        "user_id": "stress_user",
-        "session_id": "stress_session",
-        "request_id": f"stress:{rand_id()}",
-        "engine_version": engine_version,
-        "contract_version": contract_version,
-        "git_commit": os.getenv("GIT_COMMIT", "unknown"),
-        "host_id": os.getenv("HOSTNAME", "unknown"),
-        "seed": random.randint(0, 10_000_000),
-        "latency_ms": float(latency_ms),
-        "contract_valid": bool(contract_valid),
-        "contract_fail_reason": fail_reason,
-        "ua_spend": int(ua_spend),
-        "delta_s": float(delta_s),
-        "delta_s_per_ua": float(dsua),
-        "h_rigidity": float(h),
-        "work_units": int(work_units),
-        "prev_hash": prev_hash,
-        "evidence_hash": "",
-    }
-    payload["evidence_hash"] = canonical_hash(payload)
-
-    cols = get_columns(db)
-    # Build insert with only columns that exist (lets this work across minor schema variants)
-    insert_fields = []
-    insert_values = []
-    for k, v in payload.items():
-        if k in cols:
-            insert_fields.append(k)
-            insert_values.append(v)
-
-    if "contract_valid" in cols:
-        # If stored as int in sqlite, convert (some schemas store 0/1)
-        idx = insert_fields.index("contract_valid")
-        insert_values[idx] = 1 if payload["contract_valid"] else 0
-
-    placeholders = ",".join(["?"] * len(insert_fields))
-    fieldlist = ",".join(insert_fields)
-
-    con = sqlite3.connect(db.path, timeout=30)
-    try:
-        con.execute("BEGIN IMMEDIATE")
-        con.execute(
-            f"INSERT INTO {db.table} ({fieldlist}) VALUES ({placeholders})",
-            tuple(insert_values),
-        )
-        con.commit()
-    finally:
-        con.close()
+    # end timestamp; latency comes from the same clock
+    ns1 = time.time_ns()
+    ts0, ts1 = utc_iso(ns0), utc_iso(ns1)
+    latency_ms = (ns1 - ns0) / 1e6
+
+    return (
+        ts0,                                    # timestamp_start
+        ts1,                                    # timestamp_end
+        "stress_user",                          # user_id
+        "stress_session",                       # session_id
+        f"stress:{rand_id()}",                  # request_id
+        engine_version,
+        contract_version,
+        os.getenv("GIT_COMMIT", "unknown"),     # git_commit
+        os.getenv("HOSTNAME", "unknown"),       # host_id
+        random.randint(0, 10_000_000),          # seed
+        float(latency_ms),
+        bool(contract_valid),
+        fail_reason,                            # contract_fail_reason
+        int(ua_spend),
+        float(delta_s),
+        float(dsua),                            # delta_s_per_ua
+        float(h),                               # h_rigidity
+        int(work_units),
+        prev_hash,
+    )
+
+
+class Ledger:
+    """
+    Long-lived write connection to one ledger table. PRAGMAs (WAL, NORMAL
+    sync, 64 MB page cache, 256 MB mmap) are set once at open; autocommit
+    mode, so every write runs in an explicit BEGIN IMMEDIATE/COMMIT.
+    May be handed to another thread (stress() writes from one), but only
+    one thread may use it at a time.
+    """
 
-    return payload["evidence_hash"]
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA cache_size=-64000",
+        "PRAGMA mmap_size=268435456",
+    )
+
+    def __init__(self, db: DB) -> None:
+        self.db = db
+        self.con = sqlite3.connect(db.path, timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+        for pragma in self.PRAGMAS:
+            self.con.execute(pragma)
+
+    def close(self) -> None:
+        self.con.close()
+
+    def __enter__(self) -> "Ledger":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def last_hash(self) -> Optional[str]:
+        row = self.con.execute(self.db.sql_last).fetchone()
+        return row[0] if row else None
+
+    def insert_rows(self, rows: List[Tuple[Any, ...]]) -> None:
+        """Append execute() args laid out as db.insert_fields, in one transaction."""
+        if not rows:
+            return
+        self.con.execute("BEGIN IMMEDIATE")
+        try:
+            self.con.executemany(self.db.sql_insert, rows)
+        except BaseException:
+            self.con.execute("ROLLBACK")
+            raise
+        self.con.execute("COMMIT")
+
+    def insert_synthetic_event(self, prev_hash: Optional[str], engine_version: str, contract_version: str) -> str:
+        """
+        Inserts one synthetic row in its own transaction.
+        Returns the new evidence_hash.
+        """
+        emit = row_emitter(self.db.insert_fields)
+        eh, args = emit(*synthetic_event_values(prev_hash, engine_version, contract_version))
+        self.insert_rows([args])
+        return eh
+
+def insert_synthetic_event(db: DB, prev_hash: Optional[str], engine_version: str, contract_version: str) -> str:
+    """One-shot Ledger.insert_synthetic_event; hold a Ledger when inserting in a loop."""
+    with Ledger(db) as ledger:
+        return ledger.insert_synthetic_event(prev_hash, engine_version, contract_version)
 
 
 # -----------------------------
 # Chain verifier
 # -----------------------------
 
-def fetch_chain(db: DB, limit: Optional[int] = None) -> List[Dict[str, Any]]:
-    con = sqlite3.connect(db.path)
-    con.row_factory = sqlite3.Row
+def _connect_ro(db: DB) -> sqlite3.Connection:
+    # Read-only: a WAL reader never blocks the Ledger's writer
+    return sqlite3.connect(f"{Path(db.path).resolve().as_uri()}?mode=ro", uri=True)
+
+def _chain_tuples(db: DB, limit: Optional[int] = None, since_id: int = 0) -> Iterator[Tuple[Any, ...]]:
+    """
+    Chain rows (id > since_id) in id order, laid out as db.chain_cols, streamed
+    straight off the cursor. The connection closes when the iterator is
+    exhausted or closed.
+    """
+    con = _connect_ro(db)
     try:
-        q = f"SELECT * FROM {db.table} ORDER BY id ASC"
         if limit:
-            q += " LIMIT ?"
-            rows = con.execute(q, (limit,)).fetchall()
+            cur = con.execute(db.sql_chain_limit, (since_id, limit))
         else:
-            rows = con.execute(q).fetchall()
-        return [dict(r) for r in rows]
+            cur = con.execute(db.sql_chain, (since_id,))
+        yield from cur
     finally:
         con.close()
 
-def compute_row_hash_from_db_row(row: Dict[str, Any]) -> str:
+def _verify_rows(
+    rows: Iterable[Tuple[Any, ...]], cols: Tuple[str, ...], prev_eh: Optional[str], start: int,
+) -> Tuple[bool, str, Optional[str], int, Optional[int]]:
     """
-    Recompute evidence_hash from the DB row by using the canonical payload fields.
-    Assumes DB contains the CMR v1 columns. Ignores columns not in the canonical set.
+    Verify hash & chaining of consecutive rows in one pass. `rows` are raw
+    tuples laid out as db.chain_cols; `start` is the index of the first row
+    in the whole chain (0 = genesis); `prev_eh` is the evidence_hash of the
+    row before it. Returns (ok, msg, evidence_hash of the last good row,
+    rows verified, id of the last good row).
     """
-    canonical_fields = [
-        "timestamp_start", "timestamp_end",
-        "user_id", "session_id", "request_id",
-        "engine_version", "contract_version",
-        "git_commit", "host_id",
-        "seed", "latency_ms",
-        "contract_valid", "contract_fail_reason",
-        "ua_spend", "delta_s", "delta_s_per_ua",
-        "h_rigidity", "work_units",
-        "prev_hash",
-        "evidence_hash",
-    ]
-
-    payload: Dict[str, Any] = {}
-    for f in canonical_fields:
-        if f in row:
-            payload[f] = row[f]
-
-    # normalize contract_valid -> bool in hashing payload if your canonical hashing uses bool
-    # if your canonical implementation hashes 0/1 as-is, comment out this block.
-    if "contract_valid" in payload:
-        payload["contract_valid"] = bool(payload["contract_valid"])
-
-    payload["evidence_hash"] = ""  # ensure excluded
-    return canonical_hash(payload)
-
-def verify_chain(db: DB, max_rows: Optional[int] = None) -> Tuple[bool, str]:
-    rows = fetch_chain(db, limit=max_rows)
-    if not rows:
-        return False, "Ledger vacío."
-
-    # verify each row hash & chaining
-    prev_eh: Optional[str] = None
-    for i, row in enumerate(rows):
-        eh = row.get("evidence_hash")
-        ph = row.get("prev_hash")
+    # db.chain_cols order: id, hashed fields..., evidence_hash last. So the
+    # hashed values are one contiguous slice and feed the encoder unpacked.
+    i_eh = cols.index("evidence_hash") if "evidence_hash" in cols else None
+    i_ph = cols.index("prev_hash") if "prev_hash" in cols else None
+    hi = i_eh if i_eh is not None else len(cols)
+    encode = canonical_encoder(cols[1:hi], _AS_BOOL)
+    sha256 = _sha256
+
+    i = start
+    last_id: Optional[int] = None
+    for r in rows:
+        eh = r[i_eh] if i_eh is not None else None
+        ph = r[i_ph] if i_ph is not None else None
 
         if eh is None:
-            return False, f"Fila {i} sin evidence_hash."
+            return False, f"Fila {i} sin evidence_hash.", prev_eh, i - start, last_id
 
         # chaining
         if i == 0:
@@ -219,56 +395,215 @@ def verify_chain(db: DB, max_rows: Optional[int] = None) -> Tuple[bool, str]:
                 # Accept if your system uses explicit genesis prev_hash, else fail:
                 # return False, f"Genesis prev_hash inesperado: {ph}"
                 pass
-        else:
-            if ph != prev_eh:
-                return False, f"Ruptura de cadena en fila {i}: prev_hash={ph} != prev_evidence_hash={prev_eh}"
+        elif ph != prev_eh:
+            return (False, f"Ruptura de cadena en fila {i}: prev_hash={ph} != prev_evidence_hash={prev_eh}",
+                    prev_eh, i - start, last_id)
 
         # recompute hash
-        recomputed = compute_row_hash_from_db_row(row)
+        recomputed = sha256(encode(*r[1:hi])).hexdigest()
         if recomputed != eh:
-            return False, f"Evidence hash inválido en fila {i}: recomputed={recomputed} db={eh}"
+            return (False, f"Evidence hash inválido en fila {i}: recomputed={recomputed} db={eh}",
+                    prev_eh, i - start, last_id)
 
         prev_eh = eh
+        last_id = r[0]
+        i += 1
+
+    return True, "", prev_eh, i - start, last_id
+
+def verify_chain_links(db: DB, max_rows: Optional[int] = None) -> Tuple[bool, int]:
+    """
+    Chaining-only pass: walks (prev_hash, evidence_hash) pairs with no
+    canonicalization or hashing. Returns (True, rows walked) or
+    (False, index of the first row with a missing hash or broken link).
+    A row whose content changed but whose hashes did not is NOT caught here.
+    """
+    con = _connect_ro(db)
+    try:
+        if max_rows:
+            cur = con.execute(db.sql_links + " LIMIT ?", (max_rows,))
+        else:
+            cur = con.execute(db.sql_links)
+        rows = iter(cur)
+        # genesis: any prev_hash accepted (see _verify_rows)
+        first = next(rows, None)
+        if first is None:
+            return True, 0
+        prev = first[1]
+        if prev is None:
+            return False, 0
+        i = 1
+        for ph, eh in rows:
+            if ph != prev or eh is None:
+                return False, i
+            prev = eh
+            i += 1
+        return True, i
+    finally:
+        con.close()
 
-    return True, f"OK: cadena íntegra ({len(rows)} filas verificadas)."
+def verify_chain(db: DB, max_rows: Optional[int] = None, hashes: bool = True) -> Tuple[bool, str]:
+    # cheap chaining pass first; hashes=False stops there
+    ok, n = verify_chain_links(db, max_rows)
+    if ok and n == 0:
+        return False, "Ledger vacío."
+    if ok and not hashes:
+        return True, f"OK: enlaces íntegros ({n} filas verificadas, sin recalcular hashes)."
+
+    # verify each row hash & chaining, streaming. After a broken link only
+    # the rows up to it are hashed, to report the earliest failure.
+    cols = db.chain_cols
+    limit = max_rows if ok else n + 1
+    ok, msg, _, n, _ = _verify_rows(_chain_tuples(db, limit=limit), cols, None, 0)
+    if not ok:
+        return False, msg
+
+    return True, f"OK: cadena íntegra ({n} filas verificadas)."
+
+def verify_chain_incremental(
+    db: DB, last_verified_id: int = 0, last_eh: Optional[str] = None, verified: int = 0,
+) -> Tuple[bool, int, Optional[str], int, str]:
+    """
+    Verify only rows appended after `last_verified_id`, chaining from `last_eh`.
+    `verified` is how many rows were already verified (0 = start at genesis).
+    Returns (ok, new_last_id, new_last_eh, new_verified, msg); on failure the
+    cursor is returned unchanged.
+    """
+    cols = db.chain_cols
+    rows = _chain_tuples(db, since_id=last_verified_id)
+    ok, msg, eh, n, last_id = _verify_rows(rows, cols, last_eh, verified)
+    if not ok:
+        rows.close()
+        return False, last_verified_id, last_eh, verified, msg
+    if last_id is not None:
+        last_verified_id = last_id
+    verified += n
+    return True, last_verified_id, eh, verified, (
+        f"OK: cadena íntegra ({verified} filas verificadas, {n} nuevas)."
+    )
 
 
 # -----------------------------
 # Tamper test
 # -----------------------------
 
-def tamper_one_row(db: DB, row_id: int, field: str, new_value: Any) -> None:
-    con = sqlite3.connect(db.path, timeout=30)
+@contextmanager
+def tamper_session(db: DB) -> Iterator[Callable[[int, str, Any], None]]:
+    """
+    One connection and one BEGIN IMMEDIATE/COMMIT for a run of mutations.
+    Yields update(row_id, field, value). `field` must be a column of the
+    table (it is spliced into the SQL); each field's UPDATE text is built
+    once, so sqlite's statement cache reuses the prepared plan.
+    Rolls back if the block raises.
+    """
+    cols = set(get_columns(db))
+    stmts: Dict[str, str] = {}
+    con = sqlite3.connect(db.path, timeout=30, isolation_level=None)
+
+    def update(row_id: int, field: str, new_value: Any) -> None:
+        sql = stmts.get(field)
+        if sql is None:
+            if field not in cols:
+                raise ValueError(f"Campo no existe en {db.table}: {field!r}")
+            sql = stmts[field] = f"UPDATE {db.table} SET {field}=? WHERE id=?"
+        con.execute(sql, (new_value, row_id))
+
     try:
         con.execute("BEGIN IMMEDIATE")
-        con.execute(f"UPDATE {db.table} SET {field}=? WHERE id=?", (new_value, row_id))
-        con.commit()
+        try:
+            yield update
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("COMMIT")
     finally:
         con.close()
 
+def tamper_many_rows(db: DB, updates: Iterable[Tuple[int, str, Any]]) -> int:
+    """Apply (row_id, field, new_value) updates in one transaction. Returns how many."""
+    n = 0
+    with tamper_session(db) as update:
+        for row_id, col, new_value in updates:
+            update(row_id, col, new_value)
+            n += 1
+    return n
+
+def tamper_one_row(db: DB, row_id: int, field: str, new_value: Any) -> None:
+    tamper_many_rows(db, [(row_id, field, new_value)])
+
 
 # -----------------------------
 # Main: stress routine
 # -----------------------------
 
-def stress(db: DB, n: int, verify_every: int, engine_version: str, contract_version: str) -> None:
-    # find last evidence_hash as prev
-    con = sqlite3.connect(db.path)
-    try:
-        row = con.execute(f"SELECT evidence_hash FROM {db.table} ORDER BY id DESC LIMIT 1").fetchone()
-        prev = row[0] if row else None
-    finally:
-        con.close()
-
-    t0 = time.perf_counter()
-    for i in range(1, n + 1):
-        prev = insert_synthetic_event(db, prev, engine_version, contract_version)
-
-        if verify_every > 0 and (i % verify_every == 0):
-            ok, msg = verify_chain(db)
-            if not ok:
-                raise SystemExit(f"[FAIL] {msg}")
-            print(f"[OK] {i}/{n} {msg}")
+def _ledger_writer(ledger: Ledger, q: "queue.SimpleQueue[Any]", failed: List[BaseException]) -> None:
+    """
+    Writer thread: commits each list of rows it receives as one transaction.
+    A threading.Event is set once everything queued before it is committed;
+    None stops the thread. After an error, later rows are dropped (and events
+    still set) so the producer never blocks; the error lands in `failed`.
+    """
+    while True:
+        item = q.get()
+        if item is None:
+            return
+        if isinstance(item, threading.Event):
+            item.set()
+        elif not failed:
+            try:
+                ledger.insert_rows(item)
+            except BaseException as e:
+                failed.append(e)
+
+def stress(db: DB, n: int, verify_every: int, engine_version: str, contract_version: str,
+           batch: int = 500) -> None:
+    # This thread builds + hashes rows (the chain order stays deterministic);
+    # one writer thread commits them `batch` at a time over a single connection
+    with Ledger(db) as ledger:
+        # find last evidence_hash as prev
+        prev = ledger.last_hash()
+
+        emit = row_emitter(db.insert_fields)
+        pending: List[Tuple[Any, ...]] = []
+        q: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        failed: List[BaseException] = []
+        writer = threading.Thread(target=_ledger_writer, args=(ledger, q, failed),
+                                  name="ledger-writer", daemon=True)
+        # Periodic checks only verify rows appended since the last one
+        v_id, v_eh, v_n = 0, None, 0
+
+        def committed() -> None:
+            # Wait for the writer to catch up (rows must be on disk to verify)
+            done = threading.Event()
+            q.put(done)
+            done.wait()
+            if failed:
+                raise failed[0]
+
+        t0 = time.perf_counter()
+        writer.start()
+        try:
+            for i in range(1, n + 1):
+                prev, args = emit(*synthetic_event_values(prev, engine_version, contract_version))
+                pending.append(args)
+
+                due = verify_every > 0 and (i % verify_every == 0)
+                if due or len(pending) >= batch:
+                    q.put(pending)
+                    pending = []
+
+                if due:
+                    committed()
+                    ok, v_id, v_eh, v_n, msg = verify_chain_incremental(db, v_id, v_eh, v_n)
+                    if not ok:
+                        raise SystemExit(f"[FAIL] {msg}")
+                    print(f"[OK] {i}/{n} {msg}")
+            if pending:
+                q.put(pending)
+            committed()
+        finally:
+            q.put(None)
+            writer.join()
 
     dt = time.perf_counter() - t0
     print(f"[DONE] Inserted {n} events in {dt:.2f}s ({n/dt:.1f} events/s)")
@@ -282,7 +617,10 @@ def main() -> None:
     ap.add_argument("--table", default="ua_ledger")
     ap.add_argument("--stress", type=int, default=0, help="Insert N synthetic events")
     ap.add_argument("--verify-every", type=int, default=0, help="Verify chain every K inserts (0=only final)")
+    ap.add_argument("--batch", type=int, default=500, help="Rows per insert transaction")
     ap.add_argument("--verify-only", action="store_true", help="Only verify current chain")
+    ap.add_argument("--links-only", action="store_true",
+                    help="With --verify-only: check prev_hash links only, skip hash recompute")
     ap.add_argument("--tamper", action="store_true", help="Tamper test: mutate one row and verify should fail")
     ap.add_argument("--tamper-id", type=int, default=1, help="Row id to tamper")
     ap.add_argument("--tamper-field", default="ua_spend", help="Field to mutate")
@@ -291,7 +629,10 @@ def main() -> None:
     ap.add_argument("--contract-version", default="GahenaxOutput-v1.0")
     args = ap.parse_args()
 
-    db = DB(path=args.db, table=args.table)
+    try:
+        db = DB(path=args.db, table=args.table)
+    except ValueError as e:
+        raise SystemExit(str(e))
 
     if not os.path.exists(db.path):
         raise SystemExit(f"DB no existe: {db.path}")
@@ -299,7 +640,7 @@ def main() -> None:
         raise SystemExit(f"Tabla no existe: {db.table}")
 
     if args.verify_only:
-        ok, msg = verify_chain(db)
+        ok, msg = verify_chain(db, hashes=not args.links_only)
         print(msg if ok else f"[FAIL] {msg}")
         raise SystemExit(0 if ok else 2)
 
@@ -315,7 +656,10 @@ def main() -> None:
                 pass
 
         print(f"[TAMPER] Updating id={args.tamper_id} field={args.tamper_field} -> {v}")
-        tamper_one_row(db, args.tamper_id, args.tamper_field, v)
+        try:
+            tamper_one_row(db, args.tamper_id, args.tamper_field, v)
+        except ValueError as e:
+            raise SystemExit(f"[FAIL] {e}")
         ok, msg = verify_chain(db)
         if ok:
             raise SystemExit("[FAIL] Tamper did NOT break chain (unexpected). Check canonical hashing fields.")
@@ -323,7 +667,8 @@ def main() -> None:
         raise SystemExit(0)
 
     if args.stress > 0:
-        stress(db, args.stress, args.verify_every, args.engine_version, args.contract_version)
+        stress(db, args.stress, args.verify_every, args.engine_version, args.contract_version,
+               batch=max(1, args.batch))
         raise SystemExit(0)
 
     ap.print_help()